@@ -0,0 +1,640 @@
+# Shared helper for aliasesplus - not a plugin, do not add to qlx_plugins.
+#
+# Redis reads behind !alias. Every lookup is a fixed number of round trips:
+# the per steam ID name lists are fetched in one pipeline instead of one
+# LRANGE each, however many accounts share the IP. Limit mode and paged
+# output read only the window of names being shown.
+#
+# minqlx records names with LPUSH and trims each list with LTRIM 0 19, so
+# minqlx:players:<steam ID> is newest first: "latest names" are read, and
+# compaction keeps, from the head of the list.
+#
+# NameIndex maps normalized names back to steam IDs in memory for !whois.
+# AliasGraph links steam IDs and IPs transitively for !alias <id> all.
+# ResultCache keeps finished !alias results until they expire or a player in
+# them connects again.
+# purge_names and compact_names walk minqlx:players in batches for the
+# background maintenance jobs.
+#
+# Created by Doomsday
+# https://github.com/D00MSDAYDEVICE
+# https://www.youtube.com/@HIT-CLIPS
+
+# You can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+
+# You are free to modify this plugin.
+# This plugin comes with no warranty or guarantee.
+
+import bisect
+import itertools
+import re
+import threading
+import time
+from collections import OrderedDict
+
+PLAYERS_KEY = "minqlx:players"
+PLAYER_KEY = "minqlx:players:{}"
+PLAYER_IPS_KEY = "minqlx:players:{}:ips"
+IP_KEY = "minqlx:ips:{}"
+
+# NameIndex: names kept with the fuzzy (edit distance) index, names of a similar
+# length compared by the typo scan past that size, pairs added per lock hold, and
+# recent names collected before they are merged into the sorted list
+FUZZY_MAX_NAMES = 20000
+FUZZY_SCAN_MAX = 20000
+INDEX_CHUNK = 200
+MERGE_AT = 4096
+
+
+def fetch_names(db, steam_ids):
+    """All recorded names of steam_ids, in steam_ids order, in one round trip."""
+    if not steam_ids:
+        return []
+    pipe = db.pipeline(transaction=False)
+    for sid in steam_ids:
+        pipe.lrange(PLAYER_KEY.format(sid), 0, -1)
+    names = []
+    for result in pipe.execute():
+        names.extend(result)
+    return names
+
+
+def fetch_newest_names(db, steam_ids, limit):
+    """At most limit names of steam_ids, each list's newest ones, reading only those.
+
+    The steam IDs are covered from the last one back, like the tail of
+    fetch_names(). Two round trips: LLEN of every list, then LRANGE of just
+    the head window of each.
+    """
+    if not steam_ids or limit <= 0:
+        return []
+    pipe = db.pipeline(transaction=False)
+    for sid in steam_ids:
+        pipe.llen(PLAYER_KEY.format(sid))
+    lengths = pipe.execute()
+
+    # Walk back from the last list until limit names are covered
+    windows = []
+    need = limit
+    for sid, length in zip(reversed(steam_ids), reversed(lengths)):
+        if need <= 0:
+            break
+        if length:
+            take = min(need, length)
+            windows.append((sid, take))
+            need -= take
+    windows.reverse()
+
+    pipe = db.pipeline(transaction=False)
+    for sid, take in windows:
+        pipe.lrange(PLAYER_KEY.format(sid), 0, take - 1)
+    names = []
+    for result in pipe.execute():
+        names.extend(result)
+    return names
+
+
+def ip_scanner(db, ip_address):
+    """SSCAN of the steam IDs seen on ip_address, as a _scanpages scan function."""
+    key = IP_KEY.format(ip_address)
+    return lambda cursor, count: db.sscan(key, cursor, count=count)
+
+
+def fetch_recent_names(db, steam_ids, per_id):
+    """[(steam ID, total names, newest per_id names), ...] in one round trip."""
+    if not steam_ids:
+        return []
+    pipe = db.pipeline(transaction=False)
+    for sid in steam_ids:
+        pipe.llen(PLAYER_KEY.format(sid))
+        pipe.lrange(PLAYER_KEY.format(sid), 0, per_id - 1)
+    results = pipe.execute()
+    return [(sid, results[i * 2], results[i * 2 + 1]) for i, sid in enumerate(steam_ids)]
+
+
+def latest_ip(db, steam_id):
+    ips = list(db.smembers(PLAYER_IPS_KEY.format(steam_id)))
+    return ips[-1] if ips else None
+
+
+def lookup_ip(db, ip_address, name_limit=None):
+    """Steam IDs seen on ip_address and their names (only the newest name_limit if given)."""
+    steam_ids = list(db.smembers(IP_KEY.format(ip_address)))
+    if name_limit is not None:
+        return steam_ids, fetch_newest_names(db, steam_ids, name_limit)
+    return steam_ids, fetch_names(db, steam_ids)
+
+
+# ----------------------------------------------------------------------
+# Result cache
+# ----------------------------------------------------------------------
+
+class ResultCache:
+    """LRU map of lookup key -> alias result, with a TTL.
+
+    Each entry is tagged with the steam IDs and IP it covers; invalidate()
+    drops every entry carrying any of the given tags. A lookup that started
+    before an invalidation is not stored (see generation).
+    """
+
+    def __init__(self, max_entries=256, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._tagged = {}
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            if entry is not None:
+                self._remove(key)
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key, result, tags, generation):
+        if generation != self.generation or self.max_entries <= 0:
+            return
+        if key in self._entries:
+            self._remove(key)
+        tags = frozenset(tags)
+        self._entries[key] = (time.monotonic() + self.ttl, result, tags)
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+
+    def invalidate(self, *tags):
+        self.generation += 1
+        for tag in tags:
+            for key in list(self._tagged.get(tag, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._tagged.clear()
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def _remove(self, key):
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+
+# ----------------------------------------------------------------------
+# Reverse name index
+# ----------------------------------------------------------------------
+
+_color_re = re.compile(r"\^[^\^]")
+
+
+def normalize_name(name):
+    """Color codes stripped, lowercased, surrounding whitespace removed."""
+    return _color_re.sub("", name).strip().lower()
+
+
+def deletions(key):
+    """key and every string made by deleting one of its characters."""
+    return {key} | {key[:i] + key[i + 1:] for i in range(len(key))}
+
+
+def edit_distance(a, b, limit):
+    """Levenshtein distance of a and b, or limit + 1 as soon as it must exceed limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        best = i
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            cur.append(d)
+            if d < best:
+                best = d
+        if best > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def within_one(a, b):
+    """Edit distance of a and b if it is 0 or 1, else 2. One linear pass, for the typo scan."""
+    if len(a) > len(b):
+        a, b = b, a
+    if len(b) - len(a) > 1:
+        return 2
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    if i == len(a):
+        return len(b) - len(a)
+    if len(a) == len(b):
+        return 1 if a[i + 1:] == b[i + 1:] else 2
+    return 1 if a[i:] == b[i + 1:] else 2
+
+
+class NameIndex:
+    """Normalized name -> steam IDs that used it.
+
+    Names are kept sorted for prefix lookups, in one large list plus a small
+    one of recent additions that add_many() merges in outside the lock.
+    While the index holds at most fuzzy_max names, every one-character
+    deletion of a name also points back to it. Two names within edit
+    distance 1 always share a deletion, so fuzzy lookups only compare the few
+    names that share one with the query instead of scanning the whole index.
+    That part costs about 1 KB per name, so past fuzzy_max it is dropped and
+    fuzzy lookups instead scan up to FUZZY_SCAN_MAX names within one
+    character of the query's length for names one edit away.
+    Safe to update from a background thread while the game thread searches.
+    """
+
+    def __init__(self, fuzzy_max=FUZZY_MAX_NAMES):
+        # name -> steam ID, or a set of them once a second one uses the name
+        self.ids = {}
+        self.sorted = []
+        self.recent = []
+        self.fuzzy_max = fuzzy_max
+        self.deletes = {} if fuzzy_max > 0 else None
+        # name length -> names, for the typo scan once deletes is dropped
+        self.by_length = {}
+        self._lock = threading.Lock()
+        self._merging = False
+
+    def _index_deletions(self, key):
+        for variant in deletions(key):
+            names = self.deletes.get(variant)
+            if names is None:
+                self.deletes[variant] = key
+            elif isinstance(names, str):
+                self.deletes[variant] = [names, key]
+            else:
+                names.append(key)
+
+    def _add(self, key, steam_id):
+        """Record one name under the lock. Returns True if the name is new."""
+        ids = self.ids.get(key)
+        if ids is not None:
+            if isinstance(ids, str):
+                if ids != steam_id:
+                    self.ids[key] = {ids, steam_id}
+            else:
+                ids.add(steam_id)
+            return False
+
+        self.ids[key] = steam_id
+        self.by_length.setdefault(len(key), []).append(key)
+        if self.deletes is not None:
+            if len(self.ids) > self.fuzzy_max:
+                self.deletes = None
+            else:
+                self._index_deletions(key)
+        return True
+
+    def _steam_ids(self, key):
+        ids = self.ids[key]
+        return [ids] if isinstance(ids, str) else sorted(ids)
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def fuzzy_enabled(self):
+        return self.deletes is not None
+
+    def add(self, name, steam_id):
+        key = normalize_name(name)
+        if not key:
+            return
+        with self._lock:
+            if self._add(key, str(steam_id)):
+                bisect.insort(self.recent, key)
+
+    def add_many(self, pairs, chunk=INDEX_CHUNK):
+        """Bulk add of (name, steam_id) pairs, used by the backfill.
+
+        The lock is taken once per chunk of pairs, so game thread lookups and
+        adds never wait long behind a backfill.
+        """
+        pairs = iter(pairs)
+        while True:
+            batch = [(normalize_name(name), str(steam_id)) for name, steam_id in itertools.islice(pairs, chunk)]
+            if not batch:
+                break
+            with self._lock:
+                new = [key for key, steam_id in batch if key and self._add(key, steam_id)]
+                if new:
+                    self.recent = sorted(self.recent + new)
+            if len(self.recent) >= MERGE_AT:
+                self.merge()
+
+    def merge(self):
+        """Fold the recent names into the large sorted list, merging outside the lock."""
+        with self._lock:
+            if self._merging or not self.recent:
+                return
+            self._merging = True
+            main, recent = self.sorted, list(self.recent)
+        # Two sorted runs: timsort merges them in one linear pass
+        merged = sorted(main + recent)
+        with self._lock:
+            self._merging = False
+            done = set(recent)
+            self.sorted = merged
+            # Names added while merging stay in recent for the next merge
+            self.recent = [key for key in self.recent if key not in done]
+
+    def prefix(self, text, limit):
+        key = normalize_name(text)
+        with self._lock:
+            found = []
+            for names in (self.sorted, self.recent):
+                i = bisect.bisect_left(names, key)
+                end = min(len(names), i + limit)
+                while i < end and names[i].startswith(key):
+                    found.append(names[i])
+                    i += 1
+            found.sort()
+            return [(name, self._steam_ids(name)) for name in found[:limit]]
+
+    def fuzzy(self, text, max_distance, limit):
+        """Closest names sharing a one-character deletion with text (edit distance 1, some 2).
+
+        Returns (matches, complete); complete is False when the index is past
+        fuzzy_max and the typo scan gave up before covering every candidate.
+        """
+        key = normalize_name(text)
+        with self._lock:
+            if self.deletes is None:
+                return self._scan(key, limit)
+            candidates = set()
+            for variant in deletions(key):
+                names = self.deletes.get(variant)
+                if names is None:
+                    continue
+                if isinstance(names, str):
+                    candidates.add(names)
+                else:
+                    candidates.update(names)
+            scored = []
+            for name in candidates:
+                d = edit_distance(key, name, max_distance)
+                if d <= max_distance:
+                    scored.append((d, name))
+            scored.sort()
+            return [(name, self._steam_ids(name)) for _, name in scored[:limit]], True
+
+    def _scan(self, key, limit):
+        """Typo scan without the deletion index: names one edit away, lengths within one of key's."""
+        if not key or self.fuzzy_max <= 0:
+            return [], True
+        groups = [self.by_length.get(length, ()) for length in (len(key), len(key) - 1, len(key) + 1)]
+        # One edit can't change both the first and the last character, unless key is one character
+        first, last = (key[0], key[-1]) if len(key) > 1 else (None, None)
+        scored = []
+        budget = FUZZY_SCAN_MAX
+        for names in groups:
+            for name in names[:budget]:
+                if first is not None and name[0] != first and name[-1] != last:
+                    continue
+                d = within_one(key, name)
+                if d <= 1:
+                    scored.append((d, name))
+            budget -= min(budget, len(names))
+        scored.sort()
+        complete = sum(len(names) for names in groups) <= FUZZY_SCAN_MAX
+        return [(name, self._steam_ids(name)) for _, name in scored[:limit]], complete
+
+    def search(self, text, limit=10, max_distance=2):
+        """Prefix matches first, then the closest names by edit distance.
+
+        Returns (matches, complete) as fuzzy() does.
+        """
+        found = self.prefix(text, limit)
+        complete = True
+        if len(found) < limit:
+            seen = {name for name, _ in found}
+            typos, complete = self.fuzzy(text, max_distance, limit)
+            for name, ids in typos:
+                if name not in seen and len(found) < limit:
+                    found.append((name, ids))
+        return found, complete
+
+
+# ----------------------------------------------------------------------
+# Alias graph
+# ----------------------------------------------------------------------
+
+class AliasGraph:
+    """Connected components of the steam ID <-> IP graph, as a union-find.
+
+    Every steam ID and IP is a node; each recorded (steam ID, IP) pair joins
+    their components. The members of each component are kept on its root, so
+    everything transitively linked to a player is one find() away.
+    """
+
+    def __init__(self):
+        self.parent = {}
+        self.members = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.members)
+
+    def _find(self, node):
+        parent = self.parent
+        if node not in parent:
+            parent[node] = node
+            self.members[node] = {node}
+            return node
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    def _union(self, a, b):
+        ra, rb = self._find(a), self._find(b)
+        if ra == rb:
+            return
+        if len(self.members[ra]) < len(self.members[rb]):
+            ra, rb = rb, ra
+        self.parent[rb] = ra
+        self.members[ra] |= self.members.pop(rb)
+
+    def link(self, steam_id, ip):
+        with self._lock:
+            self._union(("id", str(steam_id)), ("ip", ip))
+
+    def link_many(self, pairs):
+        with self._lock:
+            for steam_id, ip in pairs:
+                self._union(("id", str(steam_id)), ("ip", ip))
+
+    def component(self, steam_id):
+        """(steam IDs, IPs) transitively linked to steam_id, including itself."""
+        node = ("id", str(steam_id))
+        with self._lock:
+            if node not in self.parent:
+                return [node[1]], []
+            members = self.members[self._find(node)]
+            steam_ids = sorted(value for kind, value in members if kind == "id")
+            ips = sorted(value for kind, value in members if kind == "ip")
+        return steam_ids, ips
+
+
+def traverse(db, steam_id, depth):
+    """(steam IDs, IPs) reachable from steam_id in at most depth steam ID -> IP -> steam ID hops.
+
+    Two pipelined round trips per hop.
+    """
+    steam_ids = {str(steam_id)}
+    ips = set()
+    frontier = [str(steam_id)]
+    for _ in range(depth):
+        pipe = db.pipeline(transaction=False)
+        for sid in frontier:
+            pipe.smembers(PLAYER_IPS_KEY.format(sid))
+        new_ips = set().union(*pipe.execute()) - ips
+        if not new_ips:
+            break
+        ips |= new_ips
+
+        pipe = db.pipeline(transaction=False)
+        for ip in new_ips:
+            pipe.smembers(IP_KEY.format(ip))
+        frontier = list(set().union(*pipe.execute()) - steam_ids)
+        if not frontier:
+            break
+        steam_ids.update(frontier)
+    return sorted(steam_ids), sorted(ips)
+
+
+def backfill(db, index, graph, batch=500):
+    """Add every player's names to index and IPs to graph. Returns the number of players scanned."""
+    scanned = 0
+    steam_ids = []
+    for sid in db.sscan_iter(PLAYERS_KEY, count=batch):
+        steam_ids.append(sid)
+        if len(steam_ids) >= batch:
+            scanned += _backfill_batch(db, index, graph, steam_ids)
+            steam_ids = []
+    if steam_ids:
+        scanned += _backfill_batch(db, index, graph, steam_ids)
+    index.merge()
+    return scanned
+
+
+def _backfill_batch(db, index, graph, steam_ids):
+    pipe = db.pipeline(transaction=False)
+    for sid in steam_ids:
+        pipe.lrange(PLAYER_KEY.format(sid), 0, -1)
+        pipe.smembers(PLAYER_IPS_KEY.format(sid))
+    results = pipe.execute()
+    names, ips = results[0::2], results[1::2]
+    index.add_many((name, sid) for sid, sid_names in zip(steam_ids, names) for name in sid_names)
+    graph.link_many((sid, ip) for sid, sid_ips in zip(steam_ids, ips) for ip in sid_ips)
+    return len(steam_ids)
+
+
+# ----------------------------------------------------------------------
+# Maintenance: bulk purge and compaction
+# ----------------------------------------------------------------------
+
+# Dedupes each name list (a name keeps its most recent position, nearest
+# the head) and keeps only the newest ARGV[1] entries, in their order. Runs
+# atomically per batch, so names pushed by a connecting player are never lost.
+COMPACT_SCRIPT = """
+local cap = tonumber(ARGV[1])
+local shrunk = 0
+for _, key in ipairs(KEYS) do
+    local names = redis.call("LRANGE", key, 0, -1)
+    local seen, newest = {}, {}
+    for i = 1, #names do
+        local name = names[i]
+        if not seen[name] and #newest < cap then
+            seen[name] = true
+            newest[#newest + 1] = name
+        end
+    end
+    if #newest < #names then
+        redis.call("DEL", key)
+        if #newest > 0 then
+            redis.call("RPUSH", key, unpack(newest))
+        end
+        shrunk = shrunk + 1
+    end
+end
+return shrunk
+"""
+
+
+def _batches(db, batch):
+    steam_ids = []
+    for sid in db.sscan_iter(PLAYERS_KEY, count=batch):
+        steam_ids.append(sid)
+        if len(steam_ids) >= batch:
+            yield steam_ids
+            steam_ids = []
+    if steam_ids:
+        yield steam_ids
+
+
+def purge_names(db, batch=500, progress=None, cancelled=None):
+    """Delete every player's name list in batches. Returns the number of players done.
+
+    Uses UNLINK so Redis frees the memory in the background, DEL on servers
+    older than 4.0 or clients without unlink(). progress(done) is called after
+    every batch; the purge stops early once cancelled() is true.
+    """
+    done = 0
+    unlink = hasattr(db, "unlink")
+    for steam_ids in _batches(db, batch):
+        if cancelled and cancelled():
+            break
+        keys = [PLAYER_KEY.format(sid) for sid in steam_ids]
+        if unlink:
+            try:
+                db.unlink(*keys)
+            except Exception as e:
+                if "unknown command" not in str(e).lower():
+                    raise
+                unlink = False
+        if not unlink:
+            db.delete(*keys)
+        done += len(steam_ids)
+        if progress:
+            progress(done)
+    return done
+
+
+def compact_names(db, max_names, batch=200, progress=None, cancelled=None):
+    """Dedupe and cap every player's name list. Returns (players done, lists shrunk)."""
+    script = db.register_script(COMPACT_SCRIPT)
+    done = shrunk = 0
+    for steam_ids in _batches(db, batch):
+        if cancelled and cancelled():
+            break
+        shrunk += script(keys=[PLAYER_KEY.format(sid) for sid in steam_ids], args=[max_names])
+        done += len(steam_ids)
+        if progress:
+            progress(done)
+    return done, shrunk
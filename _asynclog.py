@@ -0,0 +1,151 @@
+# Shared helper for autokick, backfire, namesplus and livescoreboard - not a plugin,
+# do not add to qlx_plugins.
+#
+# Asynchronous buffered log writer. Plugins hand finished log lines to write()
+# and return immediately; one background thread batches them per file and
+# appends them in bulk, so no file I/O happens on the game thread.
+#
+# - The queue is bounded. Past SAMPLE_ABOVE of its size only one in every
+#   SAMPLE_EVERY records is kept, and once it is full new records are dropped.
+#   Both are counted and can be read back with stats().
+# - A batch is flushed when it reaches FLUSH_RECORDS lines or FLUSH_INTERVAL
+#   seconds after its first line, whichever comes first.
+# - Call flush() from a plugin's unload hook to write out everything queued.
+#
+# Created by Doomsday
+# https://github.com/D00MSDAYDEVICE
+# https://www.youtube.com/@HIT-CLIPS
+
+# You can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+
+# You are free to modify this plugin.
+# This plugin comes with no warranty or guarantee.
+
+import logging
+import queue
+import threading
+import time
+
+QUEUE_SIZE = 10000
+SAMPLE_ABOVE = 0.75
+SAMPLE_EVERY = 10
+FLUSH_RECORDS = 200
+FLUSH_INTERVAL = 1.0
+
+
+class AsyncLogWriter:
+    def __init__(self, maxsize=QUEUE_SIZE, flush_records=FLUSH_RECORDS, flush_interval=FLUSH_INTERVAL):
+        self.flush_records = flush_records
+        self.flush_interval = flush_interval
+        self.sample_at = int(maxsize * SAMPLE_ABOVE)
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self._thread = None
+        self._sample_tick = 0
+
+        self.written = 0
+        self.sampled = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def write(self, path, line):
+        """Queue one line (including its newline) to be appended to path."""
+        self._ensure_thread()
+        q = self._queue
+
+        if q.qsize() >= self.sample_at:
+            with self._lock:
+                self._sample_tick += 1
+                if self._sample_tick % SAMPLE_EVERY:
+                    self.sampled += 1
+                    return False
+
+        try:
+            q.put_nowait((path, line))
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout=2.0):
+        """Block until everything queued so far is on disk, or timeout expires."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put((None, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stats(self):
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "sampled": self.sampled,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+    def _ensure_thread(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="asynclog", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        pending = {}
+        count = 0
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if count else None
+            try:
+                path, item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                path, item = None, None
+
+            if path is not None:
+                pending.setdefault(path, []).append(item)
+                count += 1
+                if count == 1:
+                    deadline = time.monotonic() + self.flush_interval
+                if count < self.flush_records and time.monotonic() < deadline:
+                    continue
+
+            if pending:
+                self._write_pending(pending)
+                pending = {}
+                count = 0
+
+            if item is not None and path is None:
+                item.set()
+
+    def _write_pending(self, pending):
+        for path, lines in pending.items():
+            try:
+                with open(path, "a", encoding="utf-8") as f:
+                    f.writelines(lines)
+                self.written += len(lines)
+            except Exception as e:
+                self.errors += 1
+                logging.getLogger("minqlx").warning(f"Failed to write to log file {path}: {e}")
+
+
+_writer = AsyncLogWriter()
+
+
+def write(path, line):
+    return _writer.write(path, line)
+
+
+def flush(timeout=2.0):
+    return _writer.flush(timeout)
+
+
+def stats():
+    return _writer.stats()
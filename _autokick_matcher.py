@@ -0,0 +1,798 @@
+# Shared helper for autokick.py - not a plugin, do not add to qlx_plugins.
+#
+# Compiled chat matcher used by autokick to check a message against every
+# banned word and regex pattern in a single pass:
+#   - banned words and a required literal from each regex pattern share one
+#     Aho-Corasick automaton, so the message is scanned once for all of them
+#   - only the regexes whose literal showed up in that scan are actually run
+#   - verdicts are kept in a bounded LRU cache, so a pasted flood of the same
+#     message costs one dict lookup per copy
+#   - pattern_hazard() flags nested quantifiers (catastrophic backtracking) at
+#     load time, and RegexSandbox can run the regexes in a child python process
+#     with a hard time budget per message (a message arriving while the child
+#     is still loading patterns gets the timeout verdict rather than waiting)
+#   - dump_cache()/read_cache() persist a built matcher so a warm start skips
+#     rebuilding the automaton and re-analysing every pattern
+#
+# Created by Doomsday
+# https://github.com/D00MSDAYDEVICE
+# https://www.youtube.com/@HIT-CLIPS
+
+# You can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+
+# You are free to modify this plugin.
+# This plugin comes with no warranty or guarantee.
+
+import json
+import os
+import pickle
+import re
+import select
+import subprocess
+import sys
+import time
+from collections import OrderedDict, deque
+
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Shortest literal worth using as a prefilter key
+MIN_LITERAL = 2
+
+# Verdict cache limits
+CACHE_ENTRIES = 4096
+CACHE_BYTES = 512 * 1024
+
+# Bump whenever the layout of the on-disk matcher cache changes
+CACHE_FORMAT = 2
+
+_MISS = object()
+
+_REPEATS = tuple(
+    getattr(sre_parse, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(sre_parse, name)
+)
+# Repeats that backtrack (possessive ones don't)
+_BACKTRACKING_REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT)
+_ASSERTS = (sre_parse.ASSERT, sre_parse.ASSERT_NOT)
+
+
+def pattern_hazard(regex):
+    """Return a reason string if regex can backtrack catastrophically, else None.
+
+    Flags a variable-length repeat nested inside any other repeat that can
+    run more than once, e.g. (a+)+, (\\w*\\s?)*, (x|y+){2,} or (?:a*){10}.
+    """
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        return None
+
+    def walk(items, in_repeat):
+        for op, av in items:
+            if op in _BACKTRACKING_REPEATS:
+                lo, hi, body = av
+                variable = hi != lo and hi > 1
+                if variable and in_repeat:
+                    return "nested quantifier"
+                # A fixed count backtracks through its body just the same: (a*){10}
+                if walk(body, in_repeat or hi > 1):
+                    return "nested quantifier"
+            elif op is sre_parse.SUBPATTERN:
+                if walk(av[-1], in_repeat):
+                    return "nested quantifier"
+            elif op is sre_parse.BRANCH:
+                for branch in av[1]:
+                    if walk(branch, in_repeat):
+                        return "nested quantifier"
+            elif op in _ASSERTS:
+                if walk(av[1], in_repeat):
+                    return "nested quantifier"
+        return None
+
+    return walk(parsed, False)
+
+
+def required_literal(regex):
+    """Return the longest lowercase ASCII string every match of regex must contain.
+
+    Returns None when no usable literal can be proven, in which case the
+    pattern has to be run against every message.
+    """
+    try:
+        parsed = sre_parse.parse(regex.pattern, regex.flags)
+    except Exception:
+        return None
+
+    best = ""
+
+    def walk(items):
+        nonlocal best
+        run = []
+        for op, av in items:
+            if op is sre_parse.LITERAL and av < 128:
+                run.append(chr(av).lower())
+                continue
+            if len(run) > len(best):
+                best = "".join(run)
+            run = []
+            if op is sre_parse.SUBPATTERN:
+                walk(av[-1])
+            elif op in _REPEATS and av[0] >= 1:
+                walk(av[2])
+        if len(run) > len(best):
+            best = "".join(run)
+
+    walk(parsed)
+    return best if len(best) >= MIN_LITERAL else None
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton over a changing set of keywords.
+
+    Keywords are added and removed in place. The failure links are also kept
+    as a tree (_children), so a change only relinks the nodes it can affect
+    instead of walking the whole trie again.
+    """
+
+    def __init__(self, keys=()):
+        # Node 0 is the root. goto[n] maps a character to the next node.
+        self._goto = [{}]
+        self._fail = [0]
+        self._key = [None]   # keyword ending exactly at this node
+        self._out = [0]      # nearest node on the failure chain that ends a keyword
+        self._depth = [0]
+        self._children = {}  # node -> nodes whose failure link points at it
+        self._count = 0
+        self._build(keys)
+
+    def __len__(self):
+        return self._count
+
+    def __contains__(self, key):
+        node = self._find(key)
+        return node is not None and self._key[node] is not None
+
+    def get_state(self):
+        return self._goto, self._fail, self._key, self._out, self._depth, self._children, self._count
+
+    @classmethod
+    def from_state(cls, state):
+        automaton = cls()
+        (automaton._goto, automaton._fail, automaton._key, automaton._out,
+         automaton._depth, automaton._children, automaton._count) = state
+        return automaton
+
+    def update(self, add=(), remove=()):
+        changed = False
+        for key in remove:
+            node = self._find(key)
+            if node is not None and self._key[node] is not None:
+                self._key[node] = None
+                self._count -= 1
+                self._relink_out(node)
+                changed = True
+        for key in add:
+            if key and key not in self:
+                self._insert(key)
+                changed = True
+        return changed
+
+    def _build(self, keys):
+        """Bulk load into an empty automaton: build the trie, then link it in one BFS."""
+        goto, key_at, depth = self._goto, self._key, self._depth
+        for key in keys:
+            if not key:
+                continue
+            node = 0
+            for ch in key:
+                nxt = goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(goto)
+                    goto.append({})
+                    key_at.append(None)
+                    depth.append(depth[node] + 1)
+                    goto[node][ch] = nxt
+                node = nxt
+            if key_at[node] is None:
+                key_at[node] = key
+                self._count += 1
+
+        fail = self._fail = [0] * len(goto)
+        out = self._out = [0] * len(goto)
+        children = self._children
+        queue = deque(goto[0].values())
+        if queue:
+            children[0] = list(queue)
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in goto[node].items():
+                f = fail[node]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                f = goto[f].get(ch, 0)
+                fail[nxt] = f
+                out[nxt] = f if key_at[f] is not None else out[f]
+                children.setdefault(f, []).append(nxt)
+                queue.append(nxt)
+
+    def _find(self, key):
+        node = 0
+        for ch in key:
+            node = self._goto[node].get(ch)
+            if node is None:
+                return None
+        return node
+
+    def _insert(self, key):
+        goto, fail, depth = self._goto, self._fail, self._depth
+        node = 0
+        new = []
+        for ch in key:
+            nxt = goto[node].get(ch)
+            if nxt is None:
+                nxt = len(goto)
+                goto.append({})
+                fail.append(0)
+                self._key.append(None)
+                self._out.append(0)
+                depth.append(depth[node] + 1)
+                goto[node][ch] = nxt
+                new.append((node, ch, nxt))
+            node = nxt
+
+        # New nodes in order of depth, so each one's parent is already linked
+        pending = {nxt for _, _, nxt in new}
+        for parent, ch, nxt in new:
+            pending.discard(nxt)
+            f = 0
+            if parent:
+                f = fail[parent]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                f = goto[f].get(ch, 0)
+            fail[nxt] = f
+            self._redirect(parent, ch, nxt, pending)
+            self._children.setdefault(f, []).append(nxt)
+
+        self._key[node] = key
+        self._count += 1
+        # Everything relinked above sits below a new node; an existing node
+        # that only became a keyword affects its own subtree
+        for n in [nxt for _, _, nxt in new] or [node]:
+            self._relink_out(n)
+
+    def _redirect(self, parent, ch, node, pending):
+        """Point at node every existing failure link that node is now the longest match for.
+
+        Those are the ch-children of nodes whose failure chain passes through
+        parent. Below a node that already has a ch-child the links are longer
+        than node's, so that part of the tree is skipped.
+        """
+        goto, fail, depth, children = self._goto, self._fail, self._depth, self._children
+        limit = depth[node]
+        moved = []
+        stack = list(children.get(parent, ()))
+        while stack:
+            n = stack.pop()
+            x = goto[n].get(ch)
+            if x is not None and x not in pending:
+                if depth[fail[x]] < limit:
+                    moved.append(x)
+                continue
+            stack.extend(children.get(n, ()))
+
+        for x in moved:
+            siblings = children[fail[x]]
+            siblings.remove(x)
+            if not siblings:
+                del children[fail[x]]
+            fail[x] = node
+            children.setdefault(node, []).append(x)
+
+    def _relink_out(self, node):
+        """Recompute the output links of node and everything whose failure chain passes it."""
+        fail, key, out, children = self._fail, self._key, self._out, self._children
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            f = fail[n]
+            out[n] = f if key[f] is not None else out[f]
+            stack.extend(children.get(n, ()))
+
+    def iter_matches(self, text):
+        """Yield every keyword found in text, in order of where it ends."""
+        if not self._count:
+            return
+        goto, fail, key, out = self._goto, self._fail, self._key, self._out
+        node = 0
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            hit = node if key[node] is not None else out[node]
+            while hit:
+                yield key[hit]
+                hit = out[hit]
+
+
+class PatternSet:
+    """Regex patterns grouped by the literal that has to appear for them to match."""
+
+    def __init__(self, patterns=(), literals=None):
+        self.patterns = list(patterns)
+        self.literals = literals if literals is not None else [required_literal(regex) for regex in self.patterns]
+        self.order = {}
+        self.by_literal = {}
+        self.always = []
+        for i, (regex, literal) in enumerate(zip(self.patterns, self.literals)):
+            self.order[regex] = i
+            if literal is None:
+                self.always.append(regex)
+            else:
+                self.by_literal.setdefault(literal, []).append(regex)
+
+    def __len__(self):
+        return len(self.patterns)
+
+
+class VerdictCache:
+    """LRU map of exact chat message -> verdict, capped by entries and key memory."""
+
+    def __init__(self, max_entries=CACHE_ENTRIES, max_bytes=CACHE_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, msg):
+        verdict = self._entries.get(msg, _MISS)
+        if verdict is _MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._entries.move_to_end(msg)
+        return verdict
+
+    def put(self, msg, verdict):
+        size = sys.getsizeof(msg)
+        if size > self.max_bytes:
+            return
+        if msg in self._entries:
+            self._entries.move_to_end(msg)
+        else:
+            self.bytes += size
+        self._entries[msg] = verdict
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            old, _ = self._entries.popitem(last=False)
+            self.bytes -= sys.getsizeof(old)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class SandboxNotReady(TimeoutError):
+    """The sandbox is still starting or loading patterns, so no verdict within the budget."""
+
+
+class _SandboxChild:
+    """One child python process running _sandbox_main(), with its reply buffer."""
+
+    def __init__(self, python, patterns):
+        self.proc = subprocess.Popen(
+            [python, "-u", __file__, "--sandbox"],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        )
+        self.buf = b""
+        self.loading = 0  # loads sent but not yet answered with "ready"
+        self.load(patterns)
+
+    def alive(self):
+        return self.proc.poll() is None
+
+    def load(self, patterns):
+        self.send({"load": patterns})
+        self.loading += 1
+
+    def ready(self):
+        """Take any "ready" replies already sent, without waiting. True once every load is answered."""
+        while self.loading:
+            line = self.readline(time.monotonic())
+            if line is None:
+                return False
+            if not line:
+                raise OSError("regex sandbox exited")
+            if "ready" in json.loads(line):
+                self.loading -= 1
+        return True
+
+    def send(self, request):
+        self.proc.stdin.write(json.dumps(request).encode() + b"\n")
+        self.proc.stdin.flush()
+
+    def readline(self, deadline):
+        """Next reply line, b"" if the child exited, or None if deadline passes first."""
+        fd = self.proc.stdout.fileno()
+        while b"\n" not in self.buf:
+            ready, _, _ = select.select([fd], [], [], max(0.0, deadline - time.monotonic()))
+            if not ready:
+                return None
+            data = os.read(fd, 65536)
+            if not data:
+                return b""
+            self.buf += data
+        line, self.buf = self.buf.split(b"\n", 1)
+        return line
+
+    def kill(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(1)
+        except Exception:
+            pass
+
+
+class RegexSandbox:
+    """Runs regex searches in a child python process that can be killed on a timeout.
+
+    re holds the GIL for the whole search, so a thread can't enforce a time
+    budget on a runaway pattern; a separate process can. search() never waits
+    for a child to start or compile its patterns: until the child has
+    answered its pattern load with "ready" it raises SandboxNotReady at once.
+    A second, pre-warmed child is kept loaded with the same patterns, so a
+    timeout swaps it in instead of waiting on a fresh child to recompile.
+    """
+
+    def __init__(self, python="python3"):
+        self.python = python
+        self._active = None
+        self._spare = None
+        self._patterns = []
+        self.restarts = 0
+
+    def set_patterns(self, patterns):
+        patterns = [[regex.pattern, regex.flags] for regex in patterns]
+        if patterns == self._patterns:
+            return
+        self._patterns = patterns
+        for child in (self._active, self._spare):
+            if child is not None:
+                try:
+                    child.load(patterns)
+                except OSError:
+                    self.close()
+                    return
+
+    def start(self):
+        """Start both children ahead of the first message; errors surface on the next search()."""
+        try:
+            self._start()
+        except OSError:
+            pass
+
+    def search(self, indices, msg, timeout):
+        """Return (matched index or None, [[index, seconds], ...]).
+
+        Raises TimeoutError if the search takes longer than timeout seconds,
+        SandboxNotReady if the child hasn't finished loading its patterns yet
+        and OSError if the child process can't be started or talked to.
+        """
+        try:
+            self._start()
+            ready = self._active.ready()
+            if ready:
+                self._active.send({"msg": msg, "idx": indices})
+                line = self._active.readline(time.monotonic() + timeout)
+        except (OSError, ValueError) as e:
+            self.close()
+            raise OSError(f"regex sandbox failed: {e}")
+
+        if not ready:
+            raise SandboxNotReady
+
+        if line is None:
+            # Still stuck in the regex engine: kill it and swap in the spare,
+            # then warm up a new spare while the game carries on
+            self._active.kill()
+            self._active, self._spare = self._spare, None
+            self.start()
+            raise TimeoutError
+        if not line:
+            self.close()
+            raise OSError("regex sandbox exited")
+        reply = json.loads(line)
+        return reply["hit"], reply["times"]
+
+    def close(self):
+        for child in (self._active, self._spare):
+            if child is not None:
+                child.kill()
+        self._active = self._spare = None
+
+    def _start(self):
+        if self._active is None or not self._active.alive():
+            if self._active is not None:
+                self._active.kill()
+            if self._spare is not None and self._spare.alive():
+                self._active, self._spare = self._spare, None
+            else:
+                self._active = self._spawn()
+        if self._spare is None or not self._spare.alive():
+            if self._spare is not None:
+                self._spare.kill()
+            self._spare = self._spawn()
+
+    def _spawn(self):
+        self.restarts += 1
+        return _SandboxChild(self.python, self._patterns)
+
+
+def dump_cache(matcher, meta):
+    """Serialize matcher plus the meta it is valid for, ready for write_cache()."""
+    return pickle.dumps(
+        {"format": CACHE_FORMAT, "meta": meta, "state": matcher.get_state()}, pickle.HIGHEST_PROTOCOL
+    )
+
+
+def write_cache(path, blob):
+    # Write then rename, so a reader never sees a half-written file
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(blob)
+    os.replace(tmp, path)
+
+
+def read_cache(path):
+    """Return (meta, state) from a cache file, or (None, None) if missing or unusable."""
+    try:
+        with open(path, "rb") as f:
+            data = pickle.load(f)
+    except Exception:
+        return None, None
+    if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT:
+        return None, None
+    return data.get("meta"), data.get("state")
+
+
+def _sandbox_main():
+    """Child side of RegexSandbox: one JSON request per line on stdin."""
+    patterns = []
+    for line in sys.stdin:
+        request = json.loads(line)
+        if "load" in request:
+            patterns = []
+            for text, flags in request["load"]:
+                try:
+                    patterns.append(re.compile(text, flags))
+                except re.error:
+                    patterns.append(None)
+            sys.stdout.write(json.dumps({"ready": len(patterns)}) + "\n")
+            sys.stdout.flush()
+            continue
+
+        msg = request["msg"]
+        hit = None
+        times = []
+        for i in request["idx"]:
+            regex = patterns[i] if i < len(patterns) else None
+            if regex is None:
+                continue
+            start = time.perf_counter()
+            found = regex.search(msg)
+            times.append([i, time.perf_counter() - start])
+            if found:
+                hit = i
+                break
+        sys.stdout.write(json.dumps({"hit": hit, "times": times}) + "\n")
+        sys.stdout.flush()
+
+
+class ChatMatcher:
+    """Single entry point used by autokick.handle_chat.
+
+    on_event(kind, detail) is called for "slow" (pattern, seconds), "timeout"
+    and "loading" (message) and "sandbox" (error) events so the plugin can log them.
+    """
+
+    def __init__(self, words=(), patterns=(), on_event=None, keys=None, literals=None):
+        self.words = set(words)
+        self.patterns = PatternSet(patterns, literals)
+        self.keys = keys if keys is not None else KeywordAutomaton(self.words | set(self.patterns.by_literal))
+        self.cache = VerdictCache()
+        self.on_event = on_event
+
+        # Regex time budget, see set_budget()
+        self.sandbox = None
+        self.timeout = 0.0
+        self.timeout_matches = True
+        self.timeouts = 0
+        self.slow_after = 0.005
+
+        # pattern -> [runs, total seconds, max seconds]
+        self.regex_times = {}
+
+    def set_budget(self, sandbox, timeout, timeout_matches=True, slow_after=0.005):
+        """Run regexes in sandbox with a timeout (seconds) per message, or inline if sandbox is None."""
+        if self.sandbox is not None and self.sandbox is not sandbox:
+            self.sandbox.close()
+        self.sandbox = sandbox
+        self.timeout = timeout
+        self.timeout_matches = timeout_matches
+        self.slow_after = slow_after
+        if sandbox is not None:
+            sandbox.set_patterns(self.patterns.patterns)
+            sandbox.start()
+        self.cache.clear()
+
+    def rebuilt(self, words, patterns):
+        """Return a new matcher for words and patterns with this one's event handler.
+
+        Leaves this matcher untouched, so it is safe to run off the game thread
+        as long as words is a copy; the new one is then swapped in whole after
+        take_over().
+        """
+        return ChatMatcher(words, patterns, on_event=self.on_event)
+
+    def get_state(self):
+        """Everything needed to rebuild this matcher without re-analysing it."""
+        return {
+            "words": self.words,
+            "automaton": self.keys.get_state(),
+            "patterns": [(regex.pattern, regex.flags) for regex in self.patterns.patterns],
+            "literals": self.patterns.literals,
+        }
+
+    @classmethod
+    def from_state(cls, state, on_event=None):
+        # Patterns still have to be compiled, re objects can't be persisted
+        patterns = [re.compile(pattern, flags) for pattern, flags in state["patterns"]]
+        return cls(
+            state["words"], patterns, on_event=on_event,
+            keys=KeywordAutomaton.from_state(state["automaton"]), literals=state["literals"],
+        )
+
+    def take_over(self, old):
+        """Carry the time budget and counters over from the matcher being replaced."""
+        self.set_budget(old.sandbox, old.timeout, old.timeout_matches, old.slow_after)
+        self.timeouts = old.timeouts
+        self.cache.hits = old.cache.hits
+        self.cache.misses = old.cache.misses
+
+    def slowest_patterns(self, count=5):
+        ranked = sorted(self.regex_times.items(), key=lambda item: item[1][2], reverse=True)
+        return ranked[:count]
+
+    def add_word(self, word):
+        if word in self.words:
+            return False
+        self.words.add(word)
+        self.keys.update(add=(word,))
+        self.cache.clear()
+        return True
+
+    def remove_word(self, word):
+        if word not in self.words:
+            return False
+        self.words.discard(word)
+        if word not in self.patterns.by_literal:
+            self.keys.update(remove=(word,))
+        self.cache.clear()
+        return True
+
+    def update_words(self, add=(), remove=()):
+        """Apply a batch of word changes to the automaton in place."""
+        add = set(add) - self.words
+        remove = set(remove) & self.words
+        if not add and not remove:
+            return False
+        self.words |= add
+        self.words -= remove
+        self.keys.update(add=add, remove=remove - set(self.patterns.by_literal))
+        self.cache.clear()
+        return True
+
+    def set_patterns(self, patterns):
+        """Swap in a new pattern list, only touching the literals that changed."""
+        new = PatternSet(patterns)
+        old_literals = set(self.patterns.by_literal)
+        new_literals = set(new.by_literal)
+        self.keys.update(
+            add=new_literals - old_literals,
+            remove=(old_literals - new_literals) - self.words,
+        )
+        self.patterns = new
+        self.regex_times = {}
+        if self.sandbox is not None:
+            self.sandbox.set_patterns(new.patterns)
+        self.cache.clear()
+
+    def match(self, msg):
+        """Return ("word", word), ("regex", pattern) or None for a chat message."""
+        verdict = self.cache.get(msg)
+        if verdict is _MISS:
+            timeouts = self.timeouts
+            verdict = self._match(msg)
+            # A timeout says nothing about the message itself, so it is never cached
+            if self.timeouts == timeouts:
+                self.cache.put(msg, verdict)
+        return verdict
+
+    def _match(self, msg):
+        patterns = self.patterns
+        candidates = []
+        for key in self.keys.iter_matches(msg.lower()):
+            if key in self.words:
+                return "word", key
+            candidates.extend(patterns.by_literal.get(key, ()))
+
+        if not msg.isascii():
+            # Unicode case folding can match a literal without it appearing in
+            # the lowercased message, so the prefilter can't be trusted here.
+            candidates = patterns.patterns
+        elif candidates:
+            candidates = sorted(set(candidates).union(patterns.always), key=patterns.order.__getitem__)
+        else:
+            candidates = patterns.always
+
+        if not candidates:
+            return None
+
+        if self.sandbox is not None:
+            try:
+                hit, times = self.sandbox.search([patterns.order[r] for r in candidates], msg, self.timeout)
+            except TimeoutError as e:
+                # The budget is a hard bound: a sandbox still loading its
+                # patterns gets the timeout verdict too, not a wait
+                self.timeouts += 1
+                self._event("loading" if isinstance(e, SandboxNotReady) else "timeout", msg)
+                return ("regex", "regex timeout") if self.timeout_matches else None
+            except OSError as e:
+                # No sandbox available: run inline until the budget is configured again
+                self.sandbox.close()
+                self.sandbox = None
+                self._event("sandbox", str(e))
+            else:
+                for i, secs in times:
+                    self._record_time(patterns.patterns[i], secs)
+                return ("regex", patterns.patterns[hit].pattern) if hit is not None else None
+
+        for regex in candidates:
+            start = time.perf_counter()
+            found = regex.search(msg)
+            self._record_time(regex, time.perf_counter() - start)
+            if found:
+                return "regex", regex.pattern
+        return None
+
+    def _record_time(self, regex, secs):
+        entry = self.regex_times.get(regex.pattern)
+        if entry is None:
+            self.regex_times[regex.pattern] = [1, secs, secs]
+        else:
+            entry[0] += 1
+            entry[1] += secs
+            if secs > entry[2]:
+                entry[2] = secs
+        if secs >= self.slow_after:
+            self._event("slow", (regex.pattern, secs))
+
+    def _event(self, kind, detail):
+        if self.on_event is not None:
+            self.on_event(kind, detail)
+
+
+if __name__ == "__main__" and "--sandbox" in sys.argv:
+    _sandbox_main()
@@ -0,0 +1,194 @@
+# Shared helper for motd, factoryvote and namesplus - not a plugin, do not add to qlx_plugins.
+#
+# Rate-limited output queue for multi-line replies. Instead of one reliable
+# server command per line, plugins enqueue text here and it is drained from
+# the game thread once per frame:
+#
+# - Consecutive lines for the same client are packed into one print command
+#   of at most MAX_COMMAND_BYTES, the way minqlx packs a single reply.
+# - Each frame sends at most CLIENT_BUDGET commands to any one client and
+#   GLOBAL_BUDGET commands in total, so 16 players loading at once don't all
+#   get their MOTD in the same frame.
+# - A client holds at most CLIENT_MAX_LINES queued lines and lines older than
+#   MAX_AGE seconds are dropped; both are counted in stats().
+#
+# Created by Doomsday
+# https://github.com/D00MSDAYDEVICE
+# https://www.youtube.com/@HIT-CLIPS
+
+# You can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+
+# You are free to modify this plugin.
+# This plugin comes with no warranty or guarantee.
+
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+import minqlx
+
+# minqlx's own limit for one packed chat/print command
+MAX_COMMAND_BYTES = 1000
+CLIENT_BUDGET = 2
+GLOBAL_BUDGET = 16
+CLIENT_MAX_LINES = 200
+MAX_AGE = 10.0
+
+# Key used for lines sent to everyone
+EVERYONE = None
+
+_color_re = re.compile(r"\^[0-7]")
+
+
+class OutputQueue:
+    def __init__(self, client_budget=CLIENT_BUDGET, global_budget=GLOBAL_BUDGET,
+                 client_max_lines=CLIENT_MAX_LINES, max_age=MAX_AGE):
+        self.client_budget = client_budget
+        self.global_budget = global_budget
+        self.client_max_lines = client_max_lines
+        self.max_age = max_age
+        # client id (or EVERYONE) -> deque of (queued at, line); insertion order is the round-robin order
+        self._queues = OrderedDict()
+        self._lock = threading.Lock()
+        self._scheduled = False
+
+        self.sent = 0
+        self.lines = 0
+        self.dropped = 0
+        self.expired = 0
+
+    def tell(self, player, text):
+        """Queue text (one or more lines) for one player or client id."""
+        self._put(getattr(player, "id", player), text)
+
+    def broadcast(self, text):
+        """Queue text for every client."""
+        self._put(EVERYONE, text)
+
+    def discard(self, player):
+        """Drop everything still queued for a player, e.g. on disconnect."""
+        with self._lock:
+            queue = self._queues.pop(getattr(player, "id", player), None)
+            if queue:
+                self.dropped += len(queue)
+
+    def depth(self):
+        with self._lock:
+            return sum(len(queue) for queue in self._queues.values())
+
+    def stats(self):
+        with self._lock:
+            depth = sum(len(queue) for queue in self._queues.values())
+            clients = len(self._queues)
+        return {"depth": depth, "clients": clients, "sent": self.sent, "lines": self.lines,
+                "dropped": self.dropped, "expired": self.expired}
+
+    def _put(self, client, text):
+        now = time.monotonic()
+        lines = [piece for line in text.replace('"', "'").split("\n") for piece in _split_long(line)]
+        with self._lock:
+            queue = self._queues.get(client)
+            if queue is None:
+                queue = self._queues[client] = deque()
+            for line in lines:
+                if len(queue) >= self.client_max_lines:
+                    self.dropped += 1
+                    continue
+                queue.append((now, line))
+            if not self._scheduled:
+                self._scheduled = True
+                minqlx.next_frame(self.drain)()
+
+    def _pack(self, queue, now):
+        """Pop lines off queue into one command body of at most MAX_COMMAND_BYTES."""
+        body = ""
+        size = 0
+        while queue:
+            queued_at, line = queue[0]
+            if now - queued_at > self.max_age:
+                queue.popleft()
+                self.expired += 1
+                continue
+            line_size = len(line.encode(errors="replace")) + 1
+            if body and size + line_size > MAX_COMMAND_BYTES:
+                break
+            queue.popleft()
+            body += line + "\n"
+            size += line_size
+            self.lines += 1
+        return body
+
+    def drain(self):
+        """Send this frame's share of the queue. Runs on the game thread."""
+        now = time.monotonic()
+        commands = []
+        with self._lock:
+            budget = self.global_budget
+            for client in list(self._queues):
+                if budget <= 0:
+                    break
+                queue = self._queues[client]
+                sent = 0
+                while queue and sent < self.client_budget and budget > 0:
+                    body = self._pack(queue, now)
+                    if body:
+                        commands.append((client, body))
+                        sent += 1
+                        budget -= 1
+                # Served clients go to the back so nobody is starved by the global budget
+                if queue:
+                    self._queues.move_to_end(client)
+                else:
+                    del self._queues[client]
+
+            self.sent += len(commands)
+            self._scheduled = bool(self._queues)
+
+        for client, body in commands:
+            minqlx.send_server_command(client, f'print "{body}"\n')
+
+        if self._scheduled:
+            minqlx.next_frame(self.drain)()
+
+
+def _last_color(text):
+    colors = _color_re.findall(text)
+    return colors[-1] if colors else ""
+
+
+def _split_long(line, limit=MAX_COMMAND_BYTES - 1):
+    """Cut a line that can't fit in one command, carrying its color over to the next piece."""
+    pieces = []
+    data = line.encode(errors="replace")
+    while len(data) > limit:
+        piece = data[:limit].decode(errors="ignore")
+        pieces.append(piece)
+        data = (_last_color(piece) + data[len(piece.encode(errors="replace")):].decode(errors="replace")).encode()
+    pieces.append(data.decode(errors="replace"))
+    return pieces
+
+
+_queue = OutputQueue()
+
+
+def tell(player, text):
+    _queue.tell(player, text)
+
+
+def broadcast(text):
+    _queue.broadcast(text)
+
+
+def discard(player):
+    _queue.discard(player)
+
+
+def depth():
+    return _queue.depth()
+
+
+def stats():
+    return _queue.stats()
@@ -0,0 +1,62 @@
+# Shared helper for aliasesplus and namesplus - not a plugin, do not add to qlx_plugins.
+#
+# Numbered pages over a Redis SSCAN/HSCAN. A SCAN batch doesn't line up with
+# a page, so a page start is (SCAN cursor, entries of that batch already
+# shown) and each caller keeps the starts of the pages it has walked, per
+# admin, so page n + 1 continues from page n instead of rescanning from 0.
+#
+# The scan function is scan(cursor, count) -> (next cursor, [entries]), e.g.
+#   lambda cursor, count: db.sscan(key, cursor, count=count)
+#
+# Created by Doomsday
+# https://github.com/D00MSDAYDEVICE
+# https://www.youtube.com/@HIT-CLIPS
+
+# You can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+
+# You are free to modify this plugin.
+# This plugin comes with no warranty or guarantee.
+
+# Where the first page begins
+FIRST = (0, 0)
+
+
+def scan_window(scan, start, size):
+    """At most size entries from start. Returns (entries, start of the next page or None at the end)."""
+    cursor, skip = start
+    entries = []
+    while True:
+        next_cursor, batch = scan(cursor, size)
+        batch = batch[skip:]
+        need = size - len(entries)
+        if len(batch) > need:
+            entries.extend(batch[:need])
+            return entries, (cursor, skip + need)
+        entries.extend(batch)
+        skip = 0
+        if int(next_cursor) == 0:
+            return entries, None
+        cursor = next_cursor
+        if len(entries) == size:
+            return entries, (cursor, 0)
+
+
+def read_page(scan, starts, page, size):
+    """Entries of page (1-based). Returns (entries, more pages).
+
+    starts[i] is where page i + 1 begins (None past the end), starting as
+    [FIRST]; it is extended in place as pages are walked.
+    """
+    entries = None
+    while len(starts) <= page and starts[-1] is not None:
+        entries, next_start = scan_window(scan, starts[-1], size)
+        starts.append(next_start)
+
+    if len(starts) <= page or starts[page - 1] is None:
+        return [], False  # past the end
+    if entries is None:
+        # Page already walked: rescan just its window
+        entries, _ = scan_window(scan, starts[page - 1], size)
+    return entries, starts[page] is not None
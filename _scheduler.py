@@ -0,0 +1,209 @@
+# Shared helper for livescoreboard, lastmaps, factoryvote and aliasesplus - not a plugin,
+# do not add to qlx_plugins.
+#
+# One scheduler for every plugin's timers. Jobs are kept in a single heap and
+# one background thread waits for the next one to come due, so plugins no
+# longer start a threading.Timer or minqlx.delay thread per callback.
+#
+# - once(owner, delay, fn, ...) runs fn once after delay seconds.
+# - every(owner, interval, fn, ...) runs fn every interval seconds.
+# - debounce(owner, key, delay, fn, ...) runs fn delay seconds after the last
+#   call with the same owner and key; earlier calls are replaced.
+# - Every call returns a Job that can be cancel()ed. owner is the plugin's
+#   name; call cancel_owner(owner) from the plugin's unload hook to drop
+#   everything it still has pending.
+# - By default fn runs on the game thread (through minqlx.next_frame). Pass
+#   threaded=True for work that should stay off the game thread, such as file
+#   writes; it then runs on the scheduler thread and must be quick.
+#
+# Created by Doomsday
+# https://github.com/D00MSDAYDEVICE
+# https://www.youtube.com/@HIT-CLIPS
+
+# You can redistribute it and/or modify it under the terms of the
+# GNU General Public License as published by the Free Software Foundation,
+# either version 3 of the License, or (at your option) any later version.
+
+# You are free to modify this plugin.
+# This plugin comes with no warranty or guarantee.
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+
+import minqlx
+
+
+class Job:
+    def __init__(self, scheduler, owner, key, due, interval, fn, args, kwargs, threaded):
+        self.scheduler = scheduler
+        self.owner = owner
+        self.key = key
+        self.due = due
+        self.interval = interval
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.threaded = threaded
+        self.cancelled = False
+
+    @property
+    def pending(self):
+        return not self.cancelled
+
+    def cancel(self):
+        self.scheduler.cancel(self)
+
+
+class Scheduler:
+    def __init__(self):
+        self._heap = []
+        self._seq = itertools.count()
+        self._owners = {}
+        self._debounced = {}
+        self._cond = threading.Condition()
+        self._thread = None
+
+        self.ran = 0
+        self.errors = 0
+
+    def once(self, owner, delay, fn, *args, threaded=False, **kwargs):
+        return self._add(owner, None, delay, None, fn, args, kwargs, threaded)
+
+    def every(self, owner, interval, fn, *args, first=None, threaded=False, **kwargs):
+        """Run fn every interval seconds, the first time after first seconds (default: interval)."""
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        delay = interval if first is None else first
+        return self._add(owner, None, delay, interval, fn, args, kwargs, threaded)
+
+    def debounce(self, owner, key, delay, fn, *args, threaded=False, **kwargs):
+        with self._cond:
+            old = self._debounced.get((owner, key))
+            if old is not None:
+                self._drop(old)
+            return self._add(owner, key, delay, None, fn, args, kwargs, threaded)
+
+    def cancel(self, job):
+        with self._cond:
+            self._drop(job)
+
+    def cancel_owner(self, owner):
+        """Cancel every pending job of owner. Returns how many were cancelled."""
+        with self._cond:
+            jobs = list(self._owners.get(owner, ()))
+            for job in jobs:
+                self._drop(job)
+            return len(jobs)
+
+    def pending(self, owner=None):
+        with self._cond:
+            if owner is not None:
+                return len(self._owners.get(owner, ()))
+            return sum(len(jobs) for jobs in self._owners.values())
+
+    def stats(self):
+        with self._cond:
+            owners = {owner: len(jobs) for owner, jobs in self._owners.items()}
+        return {"pending": sum(owners.values()), "owners": owners, "ran": self.ran, "errors": self.errors}
+
+    def _add(self, owner, key, delay, interval, fn, args, kwargs, threaded):
+        with self._cond:
+            job = Job(self, owner, key, time.monotonic() + max(0.0, delay), interval, fn, args, kwargs, threaded)
+            self._owners.setdefault(owner, set()).add(job)
+            if key is not None:
+                self._debounced[(owner, key)] = job
+            self._push(job)
+            self._ensure_thread()
+            return job
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.due, next(self._seq), job))
+        if self._heap[0][2] is job:
+            self._cond.notify()
+
+    def _drop(self, job):
+        # Cancelled jobs stay in the heap and are skipped when they come due
+        if job.cancelled:
+            return
+        job.cancelled = True
+        jobs = self._owners.get(job.owner)
+        if jobs is not None:
+            jobs.discard(job)
+            if not jobs:
+                del self._owners[job.owner]
+        if job.key is not None and self._debounced.get((job.owner, job.key)) is job:
+            del self._debounced[(job.owner, job.key)]
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="scheduler", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    while self._heap and self._heap[0][2].cancelled:
+                        heapq.heappop(self._heap)
+                    if not self._heap:
+                        self._cond.wait()
+                        continue
+                    wait = self._heap[0][0] - time.monotonic()
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+
+                _, _, job = heapq.heappop(self._heap)
+                if job.interval is not None:
+                    # Keep the original cadence, but don't fire a burst after a stall
+                    job.due = max(job.due + job.interval, time.monotonic())
+                    self._push(job)
+
+            if job.threaded:
+                self._call(job)
+            else:
+                minqlx.next_frame(self._call)(job)
+
+    def _call(self, job):
+        # A job cancelled while waiting for the next frame doesn't run
+        with self._cond:
+            if job.cancelled:
+                return
+            if job.interval is None:
+                self._drop(job)
+        try:
+            job.fn(*job.args, **job.kwargs)
+            self.ran += 1
+        except Exception:
+            self.errors += 1
+            logging.getLogger("minqlx").exception(f"Scheduled job {job.fn!r} of {job.owner} failed")
+
+
+_scheduler = Scheduler()
+
+
+def once(owner, delay, fn, *args, **kwargs):
+    return _scheduler.once(owner, delay, fn, *args, **kwargs)
+
+
+def every(owner, interval, fn, *args, **kwargs):
+    return _scheduler.every(owner, interval, fn, *args, **kwargs)
+
+
+def debounce(owner, key, delay, fn, *args, **kwargs):
+    return _scheduler.debounce(owner, key, delay, fn, *args, **kwargs)
+
+
+def cancel_owner(owner):
+    return _scheduler.cancel_owner(owner)
+
+
+def pending(owner=None):
+    return _scheduler.pending(owner)
+
+
+def stats():
+    return _scheduler.stats()
@@ -11,12 +11,18 @@
 # - qlx_afk_detection_seconds "20"
 # - qlx_afk_put_to_spec "1"
 # - qlx_afk_enable_punishment "1"
+# - qlx_afk_checks_per_frame "4"
+# - qlx_afk_move_threshold "1.0"
 #
 # If qlx_afk_enable_punishment is 0, player will be automatically spec'd at time set
+# Players are sampled from the game frame hook, at most qlx_afk_checks_per_frame per frame
+# Moving less than qlx_afk_move_threshold units between checks still counts as inactive
 
 import minqlx
 import time
-import threading
+import heapq
+import itertools
+from array import array
 
 VERSION = "v1.0"
 
@@ -25,10 +31,74 @@ VAR_WARNING = "qlx_afk_warning_seconds"
 VAR_DETECTION = "qlx_afk_detection_seconds"
 VAR_PUT_SPEC = "qlx_afk_put_to_spec"
 VAR_ENABLE_PUN = "qlx_afk_enable_punishment"
+VAR_FRAME_BUDGET = "qlx_afk_checks_per_frame"
+VAR_MOVE_THRESHOLD = "qlx_afk_move_threshold"
 
-# Movement check interval
+# Minimum time between movement checks of the same player
 CHECK_INTERVAL = 0.33
 
+# Client slots on a Quake Live server
+MAX_CLIENTS = 64
+
+# Punishment: damage per tick and seconds between ticks
+PUNISH_DAMAGE = 10
+PUNISH_DELAY = 0.5
+
+
+class InactivityStore:
+    """Fixed arrays indexed by client slot: last position, inactive seconds, last check time."""
+
+    def __init__(self):
+        self.active = bytearray(MAX_CLIENTS)
+        self.pos = array("d", bytes(8 * 3 * MAX_CLIENTS))
+        self.secs = array("d", bytes(8 * MAX_CLIENTS))
+        self.checked = array("d", bytes(8 * MAX_CLIENTS))
+
+    def reset(self, slot, position, now):
+        i = slot * 3
+        self.pos[i:i + 3] = array("d", position)
+        self.secs[slot] = 0.0
+        self.checked[slot] = now
+        self.active[slot] = 1
+
+    def clear(self, slot):
+        self.active[slot] = 0
+        self.secs[slot] = 0.0
+
+    def clear_all(self):
+        self.active = bytearray(MAX_CLIENTS)
+
+    def inactive_seconds(self, slot):
+        return self.secs[slot] if self.active[slot] else None
+
+    def update(self, slots, positions, now, threshold):
+        """Update a batch of alive players in one pass.
+
+        Returns (moved, idle): slots that moved more than threshold units, and
+        (slot, seconds before, seconds after) for the ones that didn't.
+        """
+        pos, secs, checked = self.pos, self.secs, self.checked
+        limit = threshold * threshold
+        moved = []
+        idle = []
+        for slot, (x, y, z) in zip(slots, positions):
+            i = slot * 3
+            dx = x - pos[i]
+            dy = y - pos[i + 1]
+            dz = z - pos[i + 2]
+            if dx * dx + dy * dy + dz * dz > limit:
+                pos[i] = x
+                pos[i + 1] = y
+                pos[i + 2] = z
+                secs[slot] = 0.0
+                moved.append(slot)
+            else:
+                before = secs[slot]
+                secs[slot] = before + (now - checked[slot])
+                idle.append((slot, before, secs[slot]))
+            checked[slot] = now
+        return moved, idle
+
 
 class afkplus(minqlx.Plugin):
     def __init__(self):
@@ -39,27 +109,42 @@ class afkplus(minqlx.Plugin):
         self.set_cvar_once(VAR_DETECTION, "20")
         self.set_cvar_once(VAR_PUT_SPEC, "1")
         self.set_cvar_once(VAR_ENABLE_PUN, "1")
+        self.set_cvar_once(VAR_FRAME_BUDGET, "4")
+        self.set_cvar_once(VAR_MOVE_THRESHOLD, "1.0")
 
         # Read CVARs
         self.warning_time = int(self.get_cvar(VAR_WARNING))
         self.detect_time = int(self.get_cvar(VAR_DETECTION))
         self.put_to_spec = int(self.get_cvar(VAR_PUT_SPEC))
         self.enable_punishment = int(self.get_cvar(VAR_ENABLE_PUN))
+        self.checks_per_frame = max(1, int(self.get_cvar(VAR_FRAME_BUDGET)))
+        self.move_threshold = float(self.get_cvar(VAR_MOVE_THRESHOLD))
 
-        # steam_id → [last_position, inactive_seconds]
-        self.positions = {}
+        # Per client slot inactivity tracking
+        self.store = InactivityStore()
 
-        # AFK players currently being punished
-        self.punished = []
+        # Players on red/blue this round, sampled round-robin from the frame hook
+        self.roster = []
+        self.cursor = 0
 
-        # Thread control
+        # AFK players currently being punished: slot -> (player, token).
+        # Ticks live in one heap of (due, token, slot) and run from the frame hook;
+        # a tick whose token no longer matches was cancelled and is skipped.
+        self.punished = {}
+        self.punish_heap = []
+        self.punish_tokens = itertools.count()
+
+        # Sampler control, only one round is ever being sampled
         self.running = False
 
         # Hooks
+        self.add_hook("frame", self.handle_frame)
         self.add_hook("round_start", self.handle_round_start)
         self.add_hook("round_end", self.handle_round_end)
+        self.add_hook("game_end", self.handle_game_end)
         self.add_hook("team_switch", self.handle_team_switch)
         self.add_hook("death", self.handle_death)
+        self.add_hook("player_disconnect", self.handle_player_disconnect)
         self.add_hook("unload", self.handle_unload)
 
     # ------------------------------
@@ -67,98 +152,140 @@ class afkplus(minqlx.Plugin):
     # ------------------------------
 
     def handle_round_start(self, number):
+        # Starting a round replaces whatever the previous one left behind
+        self.checks_per_frame = max(1, int(self.get_cvar(VAR_FRAME_BUDGET)))
+        self.move_threshold = float(self.get_cvar(VAR_MOVE_THRESHOLD))
+        now = time.monotonic()
         teams = self.teams()
-        for p in teams["red"] + teams["blue"]:
-            self.positions[p.steam_id] = [p.position(), 0]
+        self.roster = teams["red"] + teams["blue"]
+        self.cursor = 0
+        self.store.clear_all()
+        for p in self.roster:
+            self.store.reset(p.id, p.position(), now)
 
         self.running = True
-        self.punished = []
-
-        self.start_monitor_thread()
+        self.cancel_all_punishments()
 
     def handle_round_end(self, number):
+        self.stop_sampling()
+
+    def handle_game_end(self, data):
+        self.stop_sampling()
+
+    def stop_sampling(self):
         self.running = False
-        self.punished = []
-        self.positions = {}
+        self.cancel_all_punishments()
+        self.store.clear_all()
+        self.roster = []
 
     # ------------------------------
     #     PLAYER STATE CHANGES
     # ------------------------------
 
     def handle_team_switch(self, player, old, new):
-        sid = player.steam_id
-
         if new == "spectator":
-            self.positions.pop(sid, None)
-            if player in self.punished:
-                self.punished.remove(player)
+            self.store.clear(player.id)
+            if player in self.roster:
+                self.roster.remove(player)
+            self.cancel_punishment(player)
             return
 
         if new in ["red", "blue"]:
-            self.positions[sid] = [player.position(), 0]
+            self.store.reset(player.id, player.position(), time.monotonic())
+            if self.running and player not in self.roster:
+                self.roster.append(player)
 
     def handle_death(self, player, killer, data):
-        sid = player.steam_id
-        self.positions.pop(sid, None)
-        if player in self.punished:
-            self.punished.remove(player)
+        self.store.clear(player.id)
+        self.cancel_punishment(player)
+
+    def handle_player_disconnect(self, player, reason):
+        self.store.clear(player.id)
+        if player in self.roster:
+            self.roster.remove(player)
+        self.cancel_punishment(player)
 
     def handle_unload(self, plugin):
         if plugin == self.__class__.__name__:
-            self.running = False
-            self.punished = []
+            self.stop_sampling()
 
     # ------------------------------
-    #     THREAD LOOP
+    #     FRAME SAMPLER
     # ------------------------------
 
-    @minqlx.thread
-    def start_monitor_thread(self):
-        while self.running and self.game and self.game.state == "in_progress":
-            teams = self.teams()
+    def handle_frame(self):
+        if self.punish_heap and self.punish_heap[0][0] <= time.monotonic():
+            self.run_punishments()
 
-            for p in teams["red"] + teams["blue"]:
-                if not p.is_alive:
-                    continue
-
-                sid = p.steam_id
-                cur_pos = p.position()
-
-                if sid not in self.positions:
-                    self.positions[sid] = [cur_pos, 0]
+        if not self.running or not self.roster:
+            return
 
-                last_pos, secs = self.positions[sid]
+        # Round-robin over the roster, at most checks_per_frame players per frame,
+        # each player no more often than CHECK_INTERVAL
+        now = time.monotonic()
+        store = self.store
+        roster = self.roster
+        players = []
+        slots = []
+        positions = []
+        for _ in range(len(roster)):
+            if len(players) >= self.checks_per_frame:
+                break
+            if self.cursor >= len(roster):
+                self.cursor = 0
+            p = roster[self.cursor]
+            self.cursor += 1
+
+            slot = p.id
+            if store.active[slot] and now - store.checked[slot] < CHECK_INTERVAL:
+                continue
+
+            state = p.state
+            if state is None:
+                continue
+            if not state.is_alive:
+                # Time spent dead doesn't count as inactive
+                store.checked[slot] = now
+                continue
+            if not store.active[slot]:
+                store.reset(slot, state.position, now)
+                continue
+
+            players.append(p)
+            slots.append(slot)
+            positions.append(state.position)
+
+        if not players:
+            return
 
-                if cur_pos == last_pos:
-                    secs += CHECK_INTERVAL
-                    self.positions[sid] = [cur_pos, secs]
+        # One update for the whole batch
+        moved, idle = store.update(slots, positions, now, self.move_threshold)
+        by_slot = {p.id: p for p in players}
 
-                    # Warning
-                    if secs >= self.warning_time and secs - CHECK_INTERVAL < self.warning_time:
-                        self.warn_afk(p)
+        for slot in moved:
+            self.cancel_punishment(by_slot[slot])
 
-                    # Detection
-                    if secs >= self.detect_time and secs - CHECK_INTERVAL < self.detect_time:
-                        self.handle_afk_detected(p)
+        for slot, before, after in idle:
+            p = by_slot[slot]
 
-                else:
-                    self.positions[sid] = [cur_pos, 0]
-                    if p in self.punished:
-                        self.punished.remove(p)
+            # Warning
+            if after >= self.warning_time > before:
+                self.warn_afk(p)
 
-            time.sleep(CHECK_INTERVAL)
+            # Detection
+            if after >= self.detect_time > before:
+                self.handle_afk_detected(p)
 
     # ------------------------------
     #     AFK HANDLING
     # ------------------------------
 
-    @minqlx.next_frame
     def warn_afk(self, player):
         msg = f"You have been inactive for {self.warning_time} seconds..."
         minqlx.send_server_command(player.id, f'cp "{msg}"')
 
     def handle_afk_detected(self, player):
-        secs = int(self.positions[player.steam_id][1])
+        secs = int(self.store.inactive_seconds(player.id) or self.detect_time)
         self.msg(f"^1{player.name}^7 has been inactive for ^1{secs}^7 seconds!")
 
         # If punishment is disabled
@@ -168,39 +295,59 @@ class afkplus(minqlx.Plugin):
             return
 
         # If punishment enabled
-        self.punished.append(player)
-        self.start_punishment_loop(player)
+        self.schedule_punishment(player, time.monotonic())
 
     # ------------------------------
-    #     PUNISHMENT LOOP
+    #     PUNISHMENT SCHEDULER
     # ------------------------------
 
-    @minqlx.thread
-    def start_punishment_loop(self, player, damage=10, delay=0.5):
-        while (
-            self.running
-            and self.game
-            and self.game.state == "in_progress"
-            and player in self.punished
-        ):
-            if not player.is_alive or player.health < damage:
-                self.punished.remove(player)
+    def schedule_punishment(self, player, due):
+        token = next(self.punish_tokens)
+        self.punished[player.id] = (player, token)
+        heapq.heappush(self.punish_heap, (due, token, player.id))
+
+    def cancel_punishment(self, player):
+        self.punished.pop(player.id, None)
+
+    def cancel_all_punishments(self):
+        self.punished = {}
+        self.punish_heap = []
+
+    def run_punishments(self):
+        # Collect every tick that is due, then apply them together
+        now = time.monotonic()
+        heap = self.punish_heap
+        due = []
+        while heap and heap[0][0] <= now:
+            _, token, slot = heapq.heappop(heap)
+            entry = self.punished.get(slot)
+            if entry and entry[1] == token:
+                due.append(entry[0])
+
+        if not due:
+            return
+
+        if not self.running or not self.game or self.game.state != "in_progress":
+            self.cancel_all_punishments()
+            return
+
+        for player in due:
+            if not player.is_alive or player.health < PUNISH_DAMAGE:
+                self.cancel_punishment(player)
                 if self.put_to_spec:
                     self.move_to_spectator(player)
-                break
+                continue
 
             # Subtract health
-            @minqlx.next_frame
-            def do_damage(p, d): p.health -= d
-            do_damage(player, damage)
+            player.health -= PUNISH_DAMAGE
 
             # Update message
-            sid = player.steam_id
-            secs = int(self.positions[sid][1]) if sid in self.positions else self.detect_time
+            secs = self.store.inactive_seconds(player.id)
+            secs = int(secs) if secs is not None else self.detect_time
             msg = f"^1Inactive for {secs} seconds!^7\nMove or keep taking damage!"
             minqlx.send_server_command(player.id, f'cp "{msg}"')
 
-            time.sleep(delay)
+            self.schedule_punishment(player, now + PUNISH_DELAY)
 
     @minqlx.next_frame
     def move_to_spectator(self, player):
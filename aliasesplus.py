@@ -7,25 +7,98 @@
 # Added:
 # set qlx_aliasesmode "limit"     // limit mode
 # set qlx_aliasesmode "chunk"     // chunk mode
+# set qlx_aliasesmode "page"      // page mode: one page per !alias <id> page [n]
+# set qlx_aliasesPageNames "3"    // page mode: latest names shown per steam ID
 # set qlx_limitresults "10"       // limit mode: max # of names/IDs returned
 # set qlx_chunktime "500"         // chunk mode: delay in ms between chunks
+# set qlx_aliasesAsync "1"        // run lookups on worker threads, replies arrive when ready
+# set qlx_aliasesWorkers "2"      // worker threads
+# set qlx_aliasesMaxLookups "4"   // lookups running at once, more are turned away
+#
+# !alias <id> all follows shared IPs transitively, !alias <id> depth <n> at most n hops
+# set qlx_aliasesMaxDepth "3"     // highest depth allowed
+# set qlx_aliasesCacheTTL "300"   // seconds a result is reused, !aliascache shows hit rate
+# set qlx_aliasesCacheSize "256"  // results kept
+#
+# !clearaliases and !compactaliases run in the background, !aliasjob [stop] shows progress
+# set qlx_aliasesMaxNames "50"     // compaction: dedupe and keep this many latest names per player
+# set qlx_aliasesCompactHours "0"  // also compact every N hours (0 = only by command)
+# !whois <partial name> finds steam IDs by name (prefix, then edit distance)
+# set qlx_aliasesFuzzyMaxNames "20000" // !whois typo index up to this many names, a bounded scan past it (0 = prefix only)
+#
+# Requires _aliases.py, _scanpages.py and _scheduler.py in the same folder.
 
 import minqlx
 import minqlx.database
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import _aliases, _scanpages, _scheduler
+
+
+# Highest page !alias <id> page <n> will walk to
+MAX_PAGE = 100
 
 
 class aliasesplus(minqlx.Plugin):
     database = minqlx.database.Redis
 
     def __init__(self):
-        self.add_command("alias", self.cmd_alias, usage="<id>")
+        self.add_command("alias", self.cmd_alias, usage="<id> [all | depth <n> | page [n]]")
         self.add_command("clearaliases", self.cmd_clearaliases, 5)
+        self.add_command("compactaliases", self.cmd_compactaliases, 5)
+        self.add_command("aliasjob", self.cmd_aliasjob, 5)
+        self.add_command("whois", self.cmd_whois, usage="<partial name>")
+        self.add_command("aliascache", self.cmd_aliascache)
         self.add_command("tomtec_versions", self.cmd_showversion)
+        self.add_hook("player_connect", self.handle_player_connect)
+        self.add_hook("userinfo", self.handle_userinfo)
+        self.add_hook("player_disconnect", self.handle_player_disconnect)
+        self.add_hook("unload", self.handle_unload)
 
         # CVARs for output behavior
-        self.set_cvar_once("qlx_aliasesmode", "limit")    # limit or chunk
+        self.set_cvar_once("qlx_aliasesmode", "limit")    # limit, chunk or page
         self.set_cvar_once("qlx_limitresults", "10")      # number of results to show
         self.set_cvar_once("qlx_chunktime", "500")        # delay in ms between chunk sends
+        self.set_cvar_once("qlx_aliasesPageNames", "3")   # page mode: latest names shown per steam ID
+
+        # CVARs for running lookups off the game thread
+        self.set_cvar_once("qlx_aliasesAsync", "1")       # 1 = look up on worker threads
+        self.set_cvar_once("qlx_aliasesWorkers", "2")     # worker threads
+        self.set_cvar_once("qlx_aliasesMaxLookups", "4")  # lookups running at once
+        self.set_cvar_once("qlx_aliasesMaxDepth", "3")    # highest !alias <id> depth <n>
+        self.set_cvar_once("qlx_aliasesCacheTTL", "300")  # seconds a result is reused (0 disables)
+        self.set_cvar_once("qlx_aliasesCacheSize", "256") # results kept
+        self.set_cvar_once("qlx_aliasesMaxNames", "50")   # compaction keeps this many latest names per player
+        self.set_cvar_once("qlx_aliasesCompactHours", "0")  # run compaction every N hours (0 = only by command)
+        self.set_cvar_once("qlx_aliasesFuzzyMaxNames", "20000")  # names kept in the !whois typo index (0 disables)
+
+        # Lookups in progress: target (IP or steam ID) -> [(channel, player name), ...],
+        # and ("page", admin steam ID) -> {"target", "ip", "channel", "name"} for page mode
+        self.in_flight = {}
+
+        # Page mode: admin steam ID -> {"target", "ip", "starts", "page"}
+        self.page_cursors = {}
+        self.pool = ThreadPoolExecutor(max_workers=max(1, self.get_cvar("qlx_aliasesWorkers", int)),
+                                       thread_name_prefix="aliasesplus")
+
+        # Normalized name -> steam IDs and the steam ID <-> IP graph, filled from Redis in the background
+        self.names = _aliases.NameIndex(self.get_cvar("qlx_aliasesFuzzyMaxNames", int))
+        self.graph = _aliases.AliasGraph()
+        self.names_ready = False
+        self.backfill_index()
+
+        # Finished results, dropped when they expire or someone in them connects
+        ttl = self.get_cvar("qlx_aliasesCacheTTL", int)
+        self.cache = _aliases.ResultCache(self.get_cvar("qlx_aliasesCacheSize", int) if ttl > 0 else 0, ttl)
+
+        # Background purge/compaction: one at a time, progress in self.job
+        self.job = None
+        self.job_cancel = threading.Event()
+        compact_hours = self.get_cvar("qlx_aliasesCompactHours", float)
+        if compact_hours > 0:
+            _scheduler.every(self.__class__.__name__, compact_hours * 3600, self.start_job, "compact", None)
 
         self.plugin_version = "1.0"
 
@@ -39,7 +112,72 @@ class aliasesplus(minqlx.Plugin):
             chunk = items[i:i + chunk_size]
             msg = " ^4*^7  " + "\n ^4*^7  ".join(chunk)
 
-            minqlx.delay((delay_ms * (i // chunk_size)) / 1000, channel.reply, msg)
+            _scheduler.once(self.__class__.__name__, (delay_ms * (i // chunk_size)) / 1000, channel.reply, msg)
+
+    # ----------------------------------------------------------------------
+    # Reverse name index
+    # ----------------------------------------------------------------------
+    @minqlx.thread
+    def backfill_index(self):
+        start = time.perf_counter()
+        try:
+            scanned = _aliases.backfill(self.db, self.names, self.graph)
+        except Exception as e:
+            self.logger.error(f"Name index backfill failed: {e}")
+            return
+        self.names_ready = True
+        fuzzy = "indexed" if self.names.fuzzy_enabled else "scanned"
+        self.logger.info(f"Name index: {len(self.names)} names ({fuzzy} typo matching), {len(self.graph)} alias groups "
+                         f"from {scanned} players in {time.perf_counter() - start:.1f}s")
+
+    def handle_player_connect(self, player):
+        self.names.add(player.name, player.steam_id)
+        if player.ip:
+            self.graph.link(player.steam_id, player.ip)
+
+        # This connect may record a new name or IP: forget results it touches
+        self.cache.invalidate(("id", str(player.steam_id)), ("ip", player.ip))
+
+    def handle_player_disconnect(self, player, reason):
+        self.page_cursors.pop(player.steam_id, None)
+
+    def handle_userinfo(self, player, changed):
+        if "name" in changed:
+            self.names.add(changed["name"], player.steam_id)
+
+    def cmd_whois(self, player, msg, channel):
+        if len(msg) < 2:
+            return minqlx.RET_USAGE
+
+        text = " ".join(msg[1:])
+        matches, complete = self.names.search(text, limit=self.get_cvar("qlx_limitresults", int))
+        if not self.names_ready:
+            note = " (name index still loading)"
+        elif not complete:
+            note = " (typo matching only checked part of the names)"
+        else:
+            note = ""
+        if not matches:
+            channel.reply(f"^7No names matching ^3{text}^7{note}.")
+            return
+
+        channel.reply(f"^7Names matching ^3{text}^7{note}:")
+        channel.reply("\n".join(f" ^4*^7  {name}: {', '.join(ids)}" for name, ids in matches))
+
+    def cmd_aliascache(self, player, msg, channel):
+        cache = self.cache
+        channel.reply(
+            f"^3Alias cache:^7 {len(cache)} results | hits: {cache.hits} | misses: {cache.misses} | "
+            f"hit rate: {cache.hit_rate():.0%} | invalidated: {cache.invalidations}"
+        )
+
+    def handle_unload(self, plugin):
+        if plugin == self.__class__.__name__:
+            _scheduler.cancel_owner(plugin)
+            self.pool.shutdown(wait=False)
+            self.in_flight = {}
+            self.page_cursors = {}
+            self.job_cancel.set()
 
     # ----------------------------------------------------------------------
     # Main alias command
@@ -48,6 +186,25 @@ class aliasesplus(minqlx.Plugin):
         if len(msg) < 2:
             return minqlx.RET_USAGE
 
+        mode = self.get_cvar("qlx_aliasesmode").lower()
+
+        # Optional scope: "all" = every transitively linked account, "depth <n>" = n hops,
+        # "page [n]" = one page of the IP's accounts (next page if n is left out)
+        scope = None
+        if len(msg) > 2:
+            option = msg[2].lower()
+            if option == "all":
+                scope = ("all",)
+            elif option == "depth" and len(msg) > 3 and msg[3].isdigit():
+                scope = ("depth", max(1, min(int(msg[3]), self.get_cvar("qlx_aliasesMaxDepth", int))))
+            elif option == "page" and (len(msg) == 3 or msg[3].isdigit()):
+                scope = ("page", max(1, min(int(msg[3]), MAX_PAGE)) if len(msg) > 3 else None)
+            else:
+                return minqlx.RET_USAGE
+            if scope[0] == "all" and not self.names_ready:
+                # Graph still loading: walk Redis instead
+                scope = ("depth", self.get_cvar("qlx_aliasesMaxDepth", int))
+
         try:
             ident = int(msg[1])
             if 0 <= ident < 64:
@@ -56,11 +213,10 @@ class aliasesplus(minqlx.Plugin):
                 player_name = target.name
                 ip_address = target.ip
             else:
-                # SteamID64 given directly
+                # SteamID64 given directly, its IP is looked up with the aliases
                 steam_id = ident
                 player_name = str(steam_id)
-                iplist = list(self.db.smembers(f"minqlx:players:{steam_id}:ips"))
-                ip_address = iplist[-1] if iplist else None
+                ip_address = None
         except ValueError:
             channel.reply("Invalid ID. Use client ID or SteamID64.")
             return
@@ -68,20 +224,192 @@ class aliasesplus(minqlx.Plugin):
             channel.reply("Invalid client ID. Use client ID or SteamID64.")
             return
 
+        if scope is None and mode == "page":
+            scope = ("page", 1)
+        if scope is not None and scope[0] == "page":
+            return self.start_page(player, channel, player_name, steam_id, ip_address, scope[1])
+
+        # Limit mode only ever shows the newest names, so only those are read
+        name_limit = self.get_cvar("qlx_limitresults", int) if mode == "limit" else None
+
+        key = ((ip_address or steam_id) if scope is None else (steam_id, scope), name_limit)
+        result = self.cache.get(key)
+        if result is not None:
+            self.reply_aliases(channel, player_name, result, cached=True)
+            return
+
+        generation = self.cache.generation
+        if not self.get_cvar("qlx_aliasesAsync", bool):
+            result = self.lookup(steam_id, ip_address, scope, name_limit)
+            self.store_result(key, result, generation)
+            self.reply_aliases(channel, player_name, result)
+            return
+
+        # Same target already being looked up: just wait for that result too
+        if key in self.in_flight:
+            self.in_flight[key].append((channel, player_name))
+            return
+
+        if len(self.in_flight) >= self.get_cvar("qlx_aliasesMaxLookups", int):
+            channel.reply("^1Too many alias lookups running, try again in a moment.")
+            return
+
+        self.in_flight[key] = [(channel, player_name)]
+        future = self.pool.submit(self.lookup, steam_id, ip_address, scope, name_limit)
+        future.add_done_callback(lambda f: self.finish_lookup(key, generation, f))
+
+    def lookup(self, steam_id, ip_address, scope=None, name_limit=None):
+        """All Redis reads for one !alias. Runs on a worker thread in async mode.
+
+        Returns (steam IDs, names, IPs covered), or None if nothing is recorded.
+        """
+        if scope is not None:
+            if scope[0] == "all":
+                steam_ids, ips = self.graph.component(steam_id)
+            else:
+                steam_ids, ips = _aliases.traverse(self.db, steam_id, scope[1])
+            if name_limit is not None:
+                return steam_ids, _aliases.fetch_newest_names(self.db, steam_ids, name_limit), ips
+            return steam_ids, _aliases.fetch_names(self.db, steam_ids), ips
+
+        if not ip_address:
+            ip_address = _aliases.latest_ip(self.db, steam_id)
+            if not ip_address:
+                return None
+        steam_ids, names = _aliases.lookup_ip(self.db, ip_address, name_limit)
+        return steam_ids, names, [ip_address]
+
+    def store_result(self, key, result, generation):
+        if result is None:
+            return
+        steam_ids, _, ips = result
+        tags = [("id", str(sid)) for sid in steam_ids] + [("ip", ip) for ip in ips]
+        self.cache.put(key, result, tags, generation)
+
+    @minqlx.next_frame
+    def finish_lookup(self, key, generation, future):
+        waiting = self.in_flight.pop(key, None)
+        if not waiting:
+            return  # unloaded meanwhile
+
+        try:
+            result = future.result()
+        except Exception as e:
+            self.logger.error(f"Alias lookup failed: {e}")
+            for channel, _ in waiting:
+                channel.reply("^1Alias lookup failed.")
+            return
+
+        self.store_result(key, result, generation)
+        for channel, player_name in waiting:
+            self.reply_aliases(channel, player_name, result)
+
+    # ----------------------------------------------------------------------
+    # Page mode: one window of the IP's accounts per command
+    # ----------------------------------------------------------------------
+    def start_page(self, player, channel, player_name, steam_id, ip_address, page):
+        state = self.page_cursors.get(player.steam_id)
+        if state is None or state["target"] != steam_id:
+            state = {"target": steam_id, "ip": ip_address, "starts": [_scanpages.FIRST], "page": 0}
+            self.page_cursors[player.steam_id] = state
+        if page is None:
+            page = min(state["page"] + 1, MAX_PAGE)
+
+        args = (steam_id, state["ip"] or ip_address, list(state["starts"]), page,
+                self.get_cvar("qlx_limitresults", int), self.get_cvar("qlx_aliasesPageNames", int))
+
+        if not self.get_cvar("qlx_aliasesAsync", bool):
+            self.show_page(player.steam_id, steam_id, channel, player_name, self.lookup_page(*args))
+            return
+
+        key = ("page", player.steam_id)
+        pending = self.in_flight.get(key)
+        if pending is not None and pending["target"] == steam_id:
+            channel.reply(f"^3Still reading a page of {player_name}^3's aliases, try again in a moment.")
+            return
+        if pending is None and len(self.in_flight) >= self.get_cvar("qlx_aliasesMaxLookups", int):
+            channel.reply("^1Too many alias lookups running, try again in a moment.")
+            return
+        if pending is not None:
+            # A page of another player: this one replaces it, the old result is dropped
+            pending["channel"].reply(f"^3Alias page for {pending['name']}^3 dropped, "
+                                     f"a page for {player_name}^3 was asked for.")
+
+        request = {"target": steam_id, "ip": args[1], "channel": channel, "name": player_name}
+        self.in_flight[key] = request
+        future = self.pool.submit(self.lookup_page, *args)
+        future.add_done_callback(lambda f: self.finish_page(key, player.steam_id, request, f))
+
+    def lookup_page(self, steam_id, ip_address, starts, page, size, per_id):
+        """Reads one page: SSCAN up to the page, then the newest names of its steam IDs.
+
+        starts[i] is where page i + 1 begins (None past the end); it is extended
+        as pages are walked and handed back so the next page continues from it.
+        """
         if not ip_address:
+            ip_address = _aliases.latest_ip(self.db, steam_id)
+            if not ip_address:
+                return None
+
+        scan = _aliases.ip_scanner(self.db, ip_address)
+        steam_ids, more = _scanpages.read_page(scan, starts, page, size)
+        rows = _aliases.fetch_recent_names(self.db, steam_ids, per_id)
+        return {"ip": ip_address, "starts": starts, "page": page, "rows": rows, "more": more}
+
+    @minqlx.next_frame
+    def finish_page(self, key, admin_id, request, future):
+        if self.in_flight.get(key) is not request:
+            return  # superseded by a page of another player (already told), or unloaded
+        del self.in_flight[key]
+
+        channel = request["channel"]
+        try:
+            result = future.result()
+        except Exception as e:
+            self.logger.error(f"Alias page lookup failed: {e}")
+            channel.reply("^1Alias lookup failed.")
+            return
+        self.show_page(admin_id, request["target"], channel, request["name"], result)
+
+    def show_page(self, admin_id, target, channel, player_name, result):
+        state = self.page_cursors.get(admin_id)
+        if state is None:
+            return  # admin left meanwhile
+        if state["target"] != target:
+            # The cursor now belongs to a page of another player: don't overwrite it
+            channel.reply(f"^3Alias page for {player_name}^3 dropped, a page for another player was asked for.")
+            return
+
+        if result is None:
             channel.reply("No alias information found.")
             return
 
-        # Get all Steam IDs used on this IP
-        steamid_iplist = list(self.db.smembers(f"minqlx:ips:{ip_address}"))
+        state["ip"] = result["ip"]
+        state["starts"] = result["starts"]
+        state["page"] = result["page"]
+
+        page = result["page"]
+        if not result["rows"]:
+            channel.reply(f"{player_name}^7: no more accounts (page {page}).")
+            return
+
+        channel.reply(f"{player_name}^7 aliases, page {page}:")
+        channel.reply("\n".join(
+            f" ^4*^7  {sid} ({total} names): {', '.join(names) or '-'}" for sid, total, names in result["rows"]
+        ))
+        if result["more"]:
+            channel.reply("^7Use ^3!alias <id> page^7 for the next page.")
+
+    def reply_aliases(self, channel, player_name, result, cached=False):
+        if result is None:
+            channel.reply("No alias information found.")
+            return
 
-        # Collect all names for each SteamID
-        namelist = []
-        for sid in steamid_iplist:
-            names = list(self.db.lrange(f"minqlx:players:{sid}", 0, -1))
-            namelist.extend(names)
+        steamid_iplist, namelist, _ = result
+        if cached:
+            channel.reply("^7(cached result)")
 
-        # Output mode:
+        # Output mode (page mode never gets here):
         mode = self.get_cvar("qlx_aliasesmode").lower()
         limit = self.get_cvar("qlx_limitresults", int)
 
@@ -128,17 +456,91 @@ class aliasesplus(minqlx.Plugin):
         # Invalid CVAR → fallback to limit
         # ------------------------------
         else:
-            channel.reply("^1Invalid qlx_aliasesmode. Use ^7limit^1 or ^7chunk^1.")
+            channel.reply("^1Invalid qlx_aliasesmode. Use ^7limit^1, ^7chunk^1 or ^7page^1.")
             return
 
     # ----------------------------------------------------------------------
-    # Clear alias database (unchanged)
+    # Alias database maintenance, in the background
     # ----------------------------------------------------------------------
     def cmd_clearaliases(self, player, msg, channel):
-        players = self.db.smembers("minqlx:players")
-        for p in players:
-            del self.db[f"minqlx:players:{p}"]
-        channel.reply(f"Cleared all aliases for {len(players)} players.")
+        self.start_job("purge", channel)
+
+    def cmd_compactaliases(self, player, msg, channel):
+        self.start_job("compact", channel)
+
+    def cmd_aliasjob(self, player, msg, channel):
+        job = self.job
+        if job is None:
+            channel.reply("^7No alias maintenance job running.")
+            return
+        if len(msg) > 1 and msg[1].lower() == "stop":
+            self.job_cancel.set()
+            channel.reply(f"^7Stopping alias {job['name']}...")
+            return
+        channel.reply(f"^7Alias {job['name']}: {self.job_progress(job)}")
+
+    def start_job(self, name, channel):
+        if self.job is not None:
+            if channel:
+                channel.reply(f"^1Alias {self.job['name']} already running, see ^7!aliasjob^1.")
+            return
+        self.job = {"name": name, "done": 0, "total": 0, "started": time.monotonic(), "reported": 0}
+        self.job_cancel.clear()
+        if channel:
+            channel.reply(f"^7Alias {name} started in the background, see ^7!aliasjob^7 for progress.")
+        self.run_job(self.job, channel, self.get_cvar("qlx_aliasesMaxNames", int))
+
+    def job_progress(self, job):
+        total = job["total"]
+        percent = f" ({job['done'] * 100 // total}%)" if total else ""
+        return f"{job['done']}/{total} players{percent}, {time.monotonic() - job['started']:.0f}s"
+
+    @minqlx.thread
+    def run_job(self, job, channel, max_names):
+        def progress(done):
+            job["done"] = done
+            # Report every 25%
+            if channel and job["total"] and done * 4 // job["total"] > job["reported"]:
+                job["reported"] = done * 4 // job["total"]
+                self.job_reply(channel, f"^7Alias {job['name']}: {self.job_progress(job)}")
+
+        try:
+            job["total"] = self.db.scard(_aliases.PLAYERS_KEY)
+            if job["name"] == "purge":
+                _aliases.purge_names(self.db, progress=progress, cancelled=self.job_cancel.is_set)
+                summary = f"cleared aliases for {job['done']} players"
+            else:
+                _, shrunk = _aliases.compact_names(self.db, max_names, progress=progress,
+                                                   cancelled=self.job_cancel.is_set)
+                summary = f"{shrunk} of {job['done']} name lists trimmed to {max_names}"
+        except Exception as e:
+            self.logger.error(f"Alias {job['name']} failed: {e}")
+            summary = f"failed after {job['done']} players: {e}"
+
+        if self.job_cancel.is_set():
+            summary = f"stopped after {job['done']} players"
+        self.logger.info(f"Alias {job['name']}: {summary} in {time.monotonic() - job['started']:.1f}s")
+        self.finish_job(job, channel, summary)
+
+    @minqlx.next_frame
+    def job_reply(self, channel, text):
+        channel.reply(text)
+
+    @minqlx.next_frame
+    def finish_job(self, job, channel, summary):
+        if self.job is job:
+            self.job = None
+        # Names are gone or trimmed: cached results are out of date
+        self.cache.clear()
+        if job["name"] == "purge":
+            # Start the name index and alias graph over from what is left in Redis, so
+            # purged entries stop turning up; !alias all walks Redis until that is done
+            self.names = _aliases.NameIndex(self.get_cvar("qlx_aliasesFuzzyMaxNames", int))
+            self.graph = _aliases.AliasGraph()
+            self.names_ready = False
+            self.backfill_index()
+        if channel:
+            channel.reply(f"^7Alias {job['name']}: {summary}.")
 
     def cmd_showversion(self, player, msg, channel):
         channel.reply(f"^4aliases.py^7 - version {self.plugin_version}")
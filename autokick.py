@@ -6,12 +6,27 @@
 # CVARS:
 # qlx_autokickWarnings "1"
 # qlx_autokickMode "kick" or "warn" or "silent"
+# qlx_autokickChatRate "2" (chat messages per second per player, 0 disables the limiter)
+# qlx_autokickChatBurst "6" (messages a player can send at once before the rate applies)
+# qlx_autokickFloodWarnings "3" (floods warned before a kick, counted apart from qlx_autokickWarnings)
+#   A player who empties the chat bucket has the rest of the flood dropped. In kick mode each
+#   flood is one flood warning, never a language warning, so with the defaults a single fast
+#   paste is only warned and it takes a third flood on the same map to be kicked.
+# qlx_autokickPermCacheTTL "300" (seconds a cached admin permission is trusted)
+# qlx_autokickRegexSafety "reject" or "flag" (what to do with nested-quantifier patterns)
+# qlx_autokickRegexTimeout "0" (ms budget per message, >0 runs regexes in a separate python process)
+# qlx_autokickRegexTimeoutAction "match" or "pass" (verdict when the budget runs out or the process is still loading patterns)
+# qlx_autokickRegexPython "python3" (interpreter used for that process)
+# qlx_autokickSlowRegexMs "5" (log any single pattern run slower than this)
+# qlx_autokickPatternsPoll "5" (seconds between checks of autokick_patterns.txt for changes, 0 disables)
+# qlx_autokickSyncCheck "60" (seconds between word list version checks against Redis)
 
 # COMMANDS:
 # !addword
 # !delword
 # !listwords
 # !reloadpatterns (from your autokick_patterns.txt)
+# !akslow (slowest regex patterns so far)
 
 # You can redistribute it and/or modify it under the terms of the
 # GNU General Public License as published by the Free Software Foundation,
@@ -25,24 +40,41 @@
 
 
 import minqlx
+import hashlib
+import json
 import os
 import re
+import threading
+import time
+import uuid
 from datetime import datetime
 
+from . import _asynclog
+from ._autokick_matcher import ChatMatcher, RegexSandbox, dump_cache, pattern_hazard, read_cache, write_cache
+
+# Word changes from other servers up to this many are applied to the matcher in
+# place; a bigger batch (a resync after missed messages) is built off-thread
+SYNC_INLINE_CHANGES = 100
+
 class autokick(minqlx.Plugin):
     def __init__(self):
-        self.version = "1.2"
+        self.version = "1.3"
         self.add_command("akv", self.cmd_version, 0)
 
         # Hooks
         self.add_hook("chat", self.handle_chat)
         self.add_hook("map", self.handle_map_change)
+        self.add_hook("unload", self.handle_unload)
+        self.add_hook("player_loaded", self.handle_player_loaded)
+        self.add_hook("player_disconnect", self.handle_player_disconnect)
+        self.add_hook("command", self.handle_command)
 
         # Commands
         self.add_command("addword", self.cmd_addword, 5)
         self.add_command("delword", self.cmd_delword, 5)
         self.add_command("listwords", self.cmd_listwords, 5)
         self.add_command("reloadpatterns", self.cmd_reloadpatterns, 5)
+        self.add_command("akslow", self.cmd_slowpatterns, 5)
 
         # Log file path (must be set early)
         self.log_path = os.path.join(self.get_minqlx_dir(), "autokick.log")
@@ -50,6 +82,17 @@ class autokick(minqlx.Plugin):
         # Configurable CVARs
         self.set_cvar_once("qlx_autokickWarnings", "1")
         self.set_cvar_once("qlx_autokickMode", "kick")
+        self.set_cvar_once("qlx_autokickChatRate", "2")
+        self.set_cvar_once("qlx_autokickChatBurst", "6")
+        self.set_cvar_once("qlx_autokickFloodWarnings", "3")
+        self.set_cvar_once("qlx_autokickPermCacheTTL", "300")
+        self.set_cvar_once("qlx_autokickRegexSafety", "reject")
+        self.set_cvar_once("qlx_autokickRegexTimeout", "0")
+        self.set_cvar_once("qlx_autokickRegexTimeoutAction", "match")
+        self.set_cvar_once("qlx_autokickRegexPython", "python3")
+        self.set_cvar_once("qlx_autokickSlowRegexMs", "5")
+        self.set_cvar_once("qlx_autokickPatternsPoll", "5")
+        self.set_cvar_once("qlx_autokickSyncCheck", "60")
         # qlx_autokickMode options:
         #   kick   - warn N times then kick (original behavior)
         #   warn   - suppress message and notify the player, never kick
@@ -57,24 +100,79 @@ class autokick(minqlx.Plugin):
 
         self.max_warnings = int(self.get_cvar("qlx_autokickWarnings"))
         self.mode = self.get_cvar("qlx_autokickMode").strip().lower()
-
-        # Redis key for literal words
+        self.chat_rate = self.get_cvar("qlx_autokickChatRate", float) or 0.0
+        self.chat_burst = max(1, self.get_cvar("qlx_autokickChatBurst", int) or 1)
+        self.max_flood_warnings = max(1, self.get_cvar("qlx_autokickFloodWarnings", int) or 1)
+        self.perm_ttl = self.get_cvar("qlx_autokickPermCacheTTL", int) or 300
+        self.regex_safety = (self.get_cvar("qlx_autokickRegexSafety") or "reject").strip().lower()
+        self.patterns_poll = self.get_cvar("qlx_autokickPatternsPoll", float) or 0.0
+        self.sync_check = self.get_cvar("qlx_autokickSyncCheck", float) or 60.0
+
+        # Redis key for literal words, plus a change counter and pub/sub channel
+        # shared by every server on the same Redis
         self.words_key = "minqlx:autokickwords"
-        self.banned_words = set(self.db.smembers(self.words_key))
+        self.words_version_key = self.words_key + ":version"
+        self.words_channel = self.words_key + ":updates"
+        self.instance_id = uuid.uuid4().hex
+        self.words_version = int(self.db.get(self.words_version_key) or 0)
+        self.resync_needed = False
 
         # Regex patterns file
         self.patterns_file = os.path.join(self.get_minqlx_dir(), "autokick_patterns.txt")
-        self.regex_patterns = self.load_regex_patterns()
-
-        # Warning counters per player per map
+        self.patterns_mtime = self.get_patterns_mtime()
+
+        # Compiled single-pass matcher over banned_words + regex_patterns.
+        # A warm start loads it from the on-disk cache instead of rebuilding it.
+        self.matcher_cache_file = os.path.join(self.get_minqlx_dir(), "autokick_matcher.cache")
+        self.matcher_cache_stale = False
+        load_start = time.perf_counter()
+        self.matcher = self.load_cached_matcher()
+        if self.matcher is not None:
+            load_kind = "warm"
+            self.banned_words = set(self.matcher.words)
+            self.regex_patterns = self.matcher.patterns.patterns
+            # Verify the cached words against the full Redis set in the background
+            self.resync_needed = True
+        else:
+            load_kind = "cold"
+            self.banned_words = set(self.db.smembers(self.words_key))
+            self.regex_patterns = self.load_regex_patterns()
+            self.matcher = ChatMatcher(self.banned_words, self.regex_patterns, on_event=self.handle_matcher_event)
+            meta = self.matcher_cache_meta(self.words_version, len(self.banned_words))
+            self.save_matcher_cache(dump_cache(self.matcher, meta))
+        load_ms = (time.perf_counter() - load_start) * 1000
+        self.configure_regex_budget()
+
+        # Warning counters per player per map; floods are counted apart from language
         self.warnings = {}
+        self.flood_warnings = {}
+
+        # Chat token buckets: steam_id -> [tokens, last refill, flooding]
+        self.chat_buckets = {}
+
+        # Admin permission cache: steam_id -> (permission, expires at)
+        self.perm_cache = {}
+        self.perm_hits = 0
+        self.perm_misses = 0
 
         self.log(
             f"[INIT] autokick v{self.version} loaded. Mode: {self.mode} | "
             f"Words: {len(self.banned_words)} | Patterns: {len(self.regex_patterns)} | "
-            f"Max warnings: {self.max_warnings}"
+            f"Max warnings: {self.max_warnings} | Load: {load_kind} {load_ms:.1f} ms"
         )
 
+        # Background watcher for autokick_patterns.txt
+        self.rebuild_lock = threading.Lock()
+        # mtime of the file version being built, False when idle (None means no file)
+        self.patterns_building = False
+        self.patterns_failed = None    # mtime of the last file version that failed to build
+        self.watching = True
+        self.watch_patterns()
+
+        # Background subscriber for word changes made on other servers
+        self.syncing = True
+        self.sync_words()
+
     # ------------------------------------------------------------
     # Utility
     # ------------------------------------------------------------
@@ -83,12 +181,21 @@ class autokick(minqlx.Plugin):
         return os.path.dirname(os.path.abspath(__file__))
 
     def log(self, message):
+        # Queued; the shared writer thread does the actual file append
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open(self.log_path, "a", encoding="utf-8") as f:
-            f.write(f"[{timestamp}] {message}\n")
+        _asynclog.write(self.log_path, f"[{timestamp}] {message}\n")
 
     def cmd_version(self, player, msg, channel):
         player.tell("^3AutoKick Plugin Version:^7 {}".format(self.version))
+        player.tell(
+            f"^3Permission cache:^7 {len(self.perm_cache)} players | "
+            f"hits: {self.perm_hits} | misses: {self.perm_misses}"
+        )
+        cache = self.matcher.cache
+        player.tell(
+            f"^3Verdict cache:^7 {len(cache)} messages ({cache.bytes // 1024} KB) | "
+            f"hits: {cache.hits} | misses: {cache.misses} | hit rate: {cache.hit_rate():.0%}"
+        )
 
     def reload_cvars(self):
         try:
@@ -96,9 +203,62 @@ class autokick(minqlx.Plugin):
         except Exception:
             self.max_warnings = 1
         self.mode = self.get_cvar("qlx_autokickMode").strip().lower()
+        self.chat_rate = self.get_cvar("qlx_autokickChatRate", float) or 0.0
+        self.chat_burst = max(1, self.get_cvar("qlx_autokickChatBurst", int) or 1)
+        self.max_flood_warnings = max(1, self.get_cvar("qlx_autokickFloodWarnings", int) or 1)
+        self.perm_ttl = self.get_cvar("qlx_autokickPermCacheTTL", int) or 300
+        self.regex_safety = (self.get_cvar("qlx_autokickRegexSafety") or "reject").strip().lower()
+        self.patterns_poll = self.get_cvar("qlx_autokickPatternsPoll", float) or 0.0
+        self.sync_check = self.get_cvar("qlx_autokickSyncCheck", float) or 60.0
         if self.mode not in ("kick", "warn", "silent"):
             self.log(f"[WARN] Unknown mode '{self.mode}', defaulting to 'kick'")
             self.mode = "kick"
+        self.configure_regex_budget()
+
+    def configure_regex_budget(self):
+        timeout_ms = self.get_cvar("qlx_autokickRegexTimeout", int) or 0
+        matches = (self.get_cvar("qlx_autokickRegexTimeoutAction") or "match").strip().lower() != "pass"
+        slow_ms = self.get_cvar("qlx_autokickSlowRegexMs", float) or 5.0
+        python = self.get_cvar("qlx_autokickRegexPython") or "python3"
+
+        sandbox = None
+        if timeout_ms > 0:
+            sandbox = self.matcher.sandbox
+            if sandbox is None or sandbox.python != python:
+                sandbox = RegexSandbox(python)
+        self.matcher.set_budget(sandbox, timeout_ms / 1000, matches, slow_ms / 1000)
+
+    def cache_permission(self, steam_id):
+        perm = self.db.get_permission(steam_id)
+        self.perm_cache[steam_id] = (perm, time.monotonic() + self.perm_ttl)
+        return perm
+
+    def get_permission(self, player):
+        # Cached per steam ID; only goes to Redis on a miss or an expired entry
+        entry = self.perm_cache.get(player.steam_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self.perm_hits += 1
+            return entry[0]
+        self.perm_misses += 1
+        return self.cache_permission(player.steam_id)
+
+    def allow_chat(self, steam_id):
+        # Token bucket: refills at chat_rate per second, holds up to chat_burst
+        if self.chat_rate <= 0:
+            return True
+        now = time.monotonic()
+        bucket = self.chat_buckets.get(steam_id)
+        if bucket is None:
+            self.chat_buckets[steam_id] = [self.chat_burst - 1, now, False]
+            return True
+        tokens = min(self.chat_burst, bucket[0] + (now - bucket[1]) * self.chat_rate)
+        bucket[1] = now
+        if tokens >= 1:
+            bucket[0] = tokens - 1
+            bucket[2] = False
+            return True
+        bucket[0] = tokens
+        return False
 
     # ------------------------------------------------------------
     # Pattern Loading
@@ -120,57 +280,364 @@ class autokick(minqlx.Plugin):
                         regex = re.compile(line[4:], re.IGNORECASE)
                     else:
                         regex = re.compile(line, re.IGNORECASE)
-                    patterns.append(regex)
                 except re.error as e:
                     self.log(f"[ERROR] Invalid regex in file: '{line}' -> {e}")
+                    continue
+
+                # Catastrophic backtracking check
+                hazard = pattern_hazard(regex)
+                if hazard:
+                    if self.regex_safety == "flag":
+                        self.log(f"[FLAG] Unsafe regex kept ({hazard}): '{line}'")
+                    else:
+                        self.log(f"[REJECT] Unsafe regex skipped ({hazard}): '{line}'")
+                        continue
+                patterns.append(regex)
         self.log(f"[LOAD] Loaded {len(patterns)} regex patterns from file.")
         return patterns
 
+    def get_patterns_mtime(self):
+        try:
+            return os.stat(self.patterns_file).st_mtime_ns
+        except OSError:
+            return None
+
+    @minqlx.thread
+    def watch_patterns(self):
+        # Polls the file's mtime. patterns_mtime only moves once a build of the
+        # new file succeeded, so a failed one is tried again on the next poll.
+        while self.watching:
+            time.sleep(self.patterns_poll or 5)
+            if not self.watching or not self.patterns_poll:
+                continue
+            try:
+                mtime = self.get_patterns_mtime()
+                if mtime != self.patterns_mtime and mtime != self.patterns_building:
+                    self.patterns_building = mtime
+                    self.queue_pattern_rebuild("file changed", mtime)
+            except Exception as e:
+                self.log(f"[ERROR] Pattern watcher: {e!r}")
+
+    @minqlx.next_frame
+    def queue_pattern_rebuild(self, reason, mtime):
+        self.start_pattern_rebuild(reason, mtime=mtime)
+
+    def start_pattern_rebuild(self, reason, channel=None, mtime=None):
+        # Game thread: the word set is copied here, never iterated off-thread
+        if mtime is None:
+            mtime = self.get_patterns_mtime()
+        self.rebuild_patterns(reason, set(self.banned_words), self.words_version, mtime, channel)
+
+    @minqlx.thread
+    def rebuild_patterns(self, reason, words, version, mtime, channel=None):
+        # Off the game thread: read, compile and build a complete new matcher
+        try:
+            with self.rebuild_lock:
+                start = time.perf_counter()
+                patterns = self.load_regex_patterns()
+                matcher = self.matcher.rebuilt(words, patterns)
+                elapsed = time.perf_counter() - start
+                self.write_matcher_cache(dump_cache(matcher, self.matcher_cache_meta(version, len(words))))
+        except Exception as e:
+            self.pattern_rebuild_failed(reason, mtime, channel, e)
+            return
+        self.swap_matcher(matcher, patterns, elapsed, reason, channel, mtime=mtime)
+
+    @minqlx.next_frame
+    def pattern_rebuild_failed(self, reason, mtime, channel, error):
+        # The current matcher stays; the watcher logs each failing file version once
+        self.patterns_building = False
+        if channel is not None or mtime != self.patterns_failed:
+            self.patterns_failed = mtime
+            self.log(f"[ERROR] Pattern rebuild failed ({reason}), keeping current patterns: {error!r}")
+        if channel is not None:
+            channel.reply(f"^1Reloading regex patterns failed, the current ones stay active:^7 {error}")
+
+    def start_words_rebuild(self, reason):
+        # Copied here on the game thread, the build itself runs on its own thread
+        self.rebuild_words(reason, set(self.banned_words), self.regex_patterns, self.words_version)
+
+    @minqlx.thread
+    def rebuild_words(self, reason, words, patterns, version):
+        with self.rebuild_lock:
+            start = time.perf_counter()
+            matcher = self.matcher.rebuilt(words, patterns)
+            elapsed = time.perf_counter() - start
+            self.write_matcher_cache(dump_cache(matcher, self.matcher_cache_meta(version, len(words))))
+        self.swap_matcher(matcher, patterns, elapsed, reason, None, keep_patterns=True)
+
+    @minqlx.next_frame
+    def swap_matcher(self, matcher, patterns, elapsed, reason, channel, keep_patterns=False, mtime=None):
+        if not keep_patterns:
+            # This file version is live, the watcher can stop looking at it
+            self.patterns_mtime = mtime
+            self.patterns_building = False
+
+        if keep_patterns and patterns is not self.regex_patterns:
+            # Patterns were reloaded while these words were being built
+            matcher.set_patterns(self.regex_patterns)
+            patterns = self.regex_patterns
+
+        # Words added or removed while the new matcher was being built
+        matcher.update_words(add=self.banned_words - matcher.words, remove=matcher.words - self.banned_words)
+
+        matcher.take_over(self.matcher)
+        self.matcher = matcher
+        self.regex_patterns = patterns
+        self.log(
+            f"[RELOAD] {len(patterns)} regex patterns, {len(self.banned_words)} words "
+            f"built in {elapsed * 1000:.1f} ms ({reason})"
+        )
+        if channel is not None:
+            channel.reply(
+                f"^2Reloaded {len(self.regex_patterns)} regex patterns. "
+                f"Mode: {self.mode} | Max warnings: {self.max_warnings}"
+            )
+
+    # ------------------------------------------------------------
+    # Matcher Cache
+    # ------------------------------------------------------------
+
+    def get_patterns_hash(self):
+        try:
+            with open(self.patterns_file, "rb") as f:
+                return hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+    def matcher_cache_meta(self, words_version, words_count):
+        # The word set is identified by the shared version counter and its size,
+        # both cheap to read, so a warm start never needs the full smembers
+        return {
+            "words_version": words_version,
+            "words_count": words_count,
+            "patterns_hash": self.get_patterns_hash(),
+            "regex_safety": self.regex_safety,
+        }
+
+    def load_cached_matcher(self):
+        meta, state = read_cache(self.matcher_cache_file)
+        if meta is None:
+            return None
+        if meta != self.matcher_cache_meta(self.words_version, self.db.scard(self.words_key)):
+            self.log("[CACHE] Matcher cache is out of date, rebuilding.")
+            return None
+        try:
+            return ChatMatcher.from_state(state, on_event=self.handle_matcher_event)
+        except Exception as e:
+            self.log(f"[CACHE] Matcher cache unusable, rebuilding: {e}")
+            return None
+
+    @minqlx.thread
+    def save_matcher_cache(self, blob):
+        self.write_matcher_cache(blob)
+
+    def write_matcher_cache(self, blob):
+        try:
+            write_cache(self.matcher_cache_file, blob)
+        except OSError as e:
+            self.log(f"[CACHE] Failed to write matcher cache: {e}")
+
+    # ------------------------------------------------------------
+    # Fleet Sync
+    # ------------------------------------------------------------
+
+    def publish_word_change(self, op, word):
+        # Bump the shared version and tell the other servers about the delta
+        version = self.db.incr(self.words_version_key)
+        self.db.publish(self.words_channel, json.dumps(
+            {"op": op, "word": word, "version": version, "origin": self.instance_id}
+        ))
+        self.note_words_version(version)
+
+    def note_words_version(self, version):
+        # A gap in the sequence means a change was missed somewhere
+        if version > self.words_version + 1:
+            self.resync_needed = True
+        self.words_version = max(self.words_version, version)
+
+    @minqlx.thread
+    def sync_words(self):
+        pubsub = None
+        next_check = time.monotonic() + self.sync_check
+        while self.syncing:
+            try:
+                if pubsub is None:
+                    pubsub = self.db.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(self.words_channel)
+
+                # Everything already waiting is merged into one batch for the game thread
+                added, removed = set(), set()
+                message = pubsub.get_message(timeout=1.0)
+                while message:
+                    if message["type"] == "message":
+                        change = json.loads(message["data"])
+                        if change.get("origin") != self.instance_id:
+                            self.note_words_version(int(change["version"]))
+                            if change["op"] == "add":
+                                added.add(change["word"])
+                                removed.discard(change["word"])
+                            elif change["op"] == "del":
+                                removed.add(change["word"])
+                                added.discard(change["word"])
+                    message = pubsub.get_message(timeout=0)
+                if added or removed:
+                    self.apply_word_changes(added, removed, "pub/sub")
+
+                if self.resync_needed or time.monotonic() >= next_check:
+                    next_check = time.monotonic() + self.sync_check
+                    self.check_words_version()
+            except Exception as e:
+                self.log(f"[ERROR] Word sync failed: {e}")
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+                    pubsub = None
+                self.resync_needed = True
+                time.sleep(5)
+
+        if pubsub is not None:
+            pubsub.close()
+
+    def check_words_version(self):
+        # Fallback for missed messages: compare versions and diff the full set
+        seen = self.words_version
+        version = int(self.db.get(self.words_version_key) or 0)
+        if version == seen and not self.resync_needed:
+            return
+        self.resync_needed = False
+        self.resync_words(set(self.db.smembers(self.words_key)), version, seen)
+
+    @minqlx.next_frame
+    def resync_words(self, remote, version, seen):
+        if self.words_version != seen:
+            # Changed locally or via pub/sub while fetching, compare again later
+            self.resync_needed = True
+            return
+        self.words_version = max(self.words_version, version)
+        if remote != self.banned_words:
+            self.update_banned_words(remote - self.banned_words, self.banned_words - remote, f"version check v{version}")
+
+    @minqlx.next_frame
+    def apply_word_changes(self, added, removed, source):
+        self.update_banned_words(added, removed, source)
+
+    def update_banned_words(self, added, removed, source):
+        added = added - self.banned_words
+        removed = removed & self.banned_words
+        if not added and not removed:
+            return
+        self.banned_words |= added
+        self.banned_words -= removed
+        self.log(f"[SYNC] +{len(added)} -{len(removed)} words from {source}")
+        if len(added) + len(removed) > SYNC_INLINE_CHANGES:
+            # The current matcher keeps running until the rebuilt one is swapped in
+            self.start_words_rebuild(f"sync from {source}")
+            return
+        self.matcher.update_words(add=added, remove=removed)
+        self.matcher_cache_stale = True
+
     # ------------------------------------------------------------
     # Event Hooks
     # ------------------------------------------------------------
 
     def handle_map_change(self, mapname, factory):
         self.warnings.clear()
+        self.flood_warnings.clear()
         self.log(f"[MAP] Changed to {mapname}, cleared warnings.")
         self.reload_cvars()
+        if self.matcher_cache_stale:
+            # Word list changed since the cache was written, refresh it off-thread
+            self.matcher_cache_stale = False
+            self.start_pattern_rebuild("map change, matcher cache refresh")
+
+    def handle_player_loaded(self, player):
+        try:
+            self.cache_permission(player.steam_id)
+        except Exception as e:
+            self.log(f"[WARN] Permission lookup failed for {player.name}: {e}")
+
+    def handle_player_disconnect(self, player, reason):
+        self.perm_cache.pop(player.steam_id, None)
+        self.chat_buckets.pop(player.steam_id, None)
+
+    def handle_command(self, caller, command, args):
+        # Permissions may have changed, next chat from anyone re-reads them
+        if "setperm" in command.name:
+            self.perm_cache.clear()
+
+    def handle_unload(self, plugin):
+        if plugin == self.__class__.__name__:
+            self.watching = False
+            self.syncing = False
+            if self.matcher.sandbox is not None:
+                self.matcher.sandbox.close()
+            _asynclog.flush()
+
+    def handle_matcher_event(self, kind, detail):
+        if kind == "slow":
+            pattern, secs = detail
+            self.log(f"[SLOW-REGEX] '{pattern}' took {secs * 1000:.1f} ms")
+        elif kind == "timeout":
+            verdict = "blocked" if self.matcher.timeout_matches else "allowed"
+            self.log(f"[TIMEOUT] Regex budget exceeded, message {verdict}: {detail}")
+        elif kind == "loading":
+            verdict = "blocked" if self.matcher.timeout_matches else "allowed"
+            self.log(f"[TIMEOUT] Regex sandbox still loading patterns, message {verdict}: {detail}")
+        elif kind == "sandbox":
+            self.log(f"[ERROR] Regex sandbox unavailable, running patterns inline until next reload: {detail}")
 
     def handle_chat(self, player, msg, channel):
         if not msg or player.steam_id == 0:
             return
 
-        lower_msg = msg.lower()
+        # Over the chat budget: drop before any logging or matching
+        if not self.allow_chat(player.steam_id):
+            entry = self.perm_cache.get(player.steam_id)
+            if entry is None or entry[0] < 5:
+                bucket = self.chat_buckets[player.steam_id]
+                if not bucket[2]:
+                    # Only the first dropped message of a flood counts, as a flood warning
+                    bucket[2] = True
+                    self.log(f"[FLOOD] {player.name} ({player.steam_id}) is over the chat rate limit")
+                    self.process_violation(player, "chat flood", "chat flooding",
+                                           self.flood_warnings, self.max_flood_warnings)
+                return minqlx.RET_STOP_ALL
+
         self.log(f"[CHAT] {player.name} ({player.steam_id}): {msg}")
 
         # Skip admins
         try:
-            perm = self.db.get_permission(player.steam_id)
+            perm = self.get_permission(player)
             if perm >= 5:
                 self.log(f"[SKIP] {player.name} has admin permission {perm}.")
                 return
         except Exception as e:
             self.log(f"[WARN] Permission check failed for {player.name}: {e}")
 
-        # Check literal banned words
-        for word in self.banned_words:
-            if word in lower_msg:
-                self.log(f"[MATCH-WORD] {player.name} matched '{word}'")
-                self.process_violation(player, word)
-                return minqlx.RET_STOP_ALL  # Always suppress the message
+        # Check literal banned words and regex patterns in one pass
+        result = self.matcher.match(msg)
+        if result is None:
+            return
 
-        # Check regex patterns
-        for pattern in self.regex_patterns:
-            if pattern.search(msg):
-                self.log(f"[MATCH-REGEX] {player.name} matched regex '{pattern.pattern}'")
-                self.process_violation(player, pattern.pattern)
-                return minqlx.RET_STOP_ALL  # Always suppress the message
+        kind, trigger = result
+        if kind == "word":
+            self.log(f"[MATCH-WORD] {player.name} matched '{trigger}'")
+        else:
+            self.log(f"[MATCH-REGEX] {player.name} matched regex '{trigger}'")
+        self.process_violation(player, trigger)
+        return minqlx.RET_STOP_ALL  # Always suppress the message
 
     # ------------------------------------------------------------
     # Violation Handling
     # ------------------------------------------------------------
 
-    def process_violation(self, player, trigger):
+    def process_violation(self, player, trigger, reason="inappropriate language", warnings=None, max_warnings=None):
         sid = player.steam_id
+        if warnings is None:
+            warnings, max_warnings = self.warnings, self.max_warnings
 
         if self.mode == "silent":
             # Suppress with no feedback at all
@@ -179,22 +646,22 @@ class autokick(minqlx.Plugin):
 
         if self.mode == "warn":
             # Suppress and privately notify the player only, never kick
-            player.tell("^1Your message was blocked^7: inappropriate language is not allowed.")
+            player.tell(f"^1Your message was blocked^7: {reason} is not allowed.")
             self.log(f"[SUPPRESS] {player.name}'s message suppressed for '{trigger}'")
             return
 
         # Default: kick mode — warn N times then kick
-        count = self.warnings.get(sid, 0) + 1
-        self.warnings[sid] = count
+        count = warnings.get(sid, 0) + 1
+        warnings[sid] = count
 
-        if count < self.max_warnings:
-            self.msg(f"^3Warning to {player.name}: ^7Inappropriate language detected.")
-            self.log(f"[WARN] {player.name} warned ({count}/{self.max_warnings}) for '{trigger}'")
+        if count < max_warnings:
+            self.msg(f"^3Warning to {player.name}: ^7{reason.capitalize()} detected.")
+            self.log(f"[WARN] {player.name} warned ({count}/{max_warnings}) for '{trigger}'")
         else:
-            self.msg(f"^1Player ^7{player.name} ^1was kicked for inappropriate language.")
+            self.msg(f"^1Player ^7{player.name} ^1was kicked for {reason}.")
             self.kick_player(player, trigger)
             self.log(f"[KICK] {player.name} kicked after {count} warnings for '{trigger}'")
-            del self.warnings[sid]
+            del warnings[sid]
 
     def kick_player(self, player, trigger):
         try:
@@ -216,6 +683,9 @@ class autokick(minqlx.Plugin):
             return channel.reply(f"^3'{word}'^7 already banned.")
         self.db.sadd(self.words_key, word)
         self.banned_words.add(word)
+        self.matcher.add_word(word)
+        self.matcher_cache_stale = True
+        self.publish_word_change("add", word)
         channel.reply(f"^2Added banned word:^7 {word}")
         self.log(f"[CMD] {player.name} added word '{word}'")
 
@@ -227,6 +697,9 @@ class autokick(minqlx.Plugin):
             return channel.reply(f"^3'{word}'^7 not in list.")
         self.db.srem(self.words_key, word)
         self.banned_words.remove(word)
+        self.matcher.remove_word(word)
+        self.matcher_cache_stale = True
+        self.publish_word_change("del", word)
         channel.reply(f"^1Removed banned word:^7 {word}")
         self.log(f"[CMD] {player.name} removed word '{word}'")
 
@@ -241,11 +714,19 @@ class autokick(minqlx.Plugin):
         channel.reply(" | ".join(info))
         self.log(f"[CMD] {player.name} listed banned entries.")
 
+    def cmd_slowpatterns(self, player, msg, channel):
+        slowest = self.matcher.slowest_patterns()
+        if not slowest:
+            return channel.reply("^7No regex patterns have run yet.")
+        for pattern, (runs, total, worst) in slowest:
+            channel.reply(
+                f"^3{pattern}^7 max {worst * 1000:.2f} ms | avg {total / runs * 1000:.3f} ms | runs {runs}"
+            )
+        if self.matcher.timeouts:
+            channel.reply(f"^1Regex budget timeouts:^7 {self.matcher.timeouts}")
+
     def cmd_reloadpatterns(self, player, msg, channel):
-        self.regex_patterns = self.load_regex_patterns()
+        # The reply comes from swap_matcher once the new patterns are live
         self.reload_cvars()
-        channel.reply(
-            f"^2Reloaded {len(self.regex_patterns)} regex patterns. "
-            f"Mode: {self.mode} | Max warnings: {self.max_warnings}"
-        )
+        self.start_pattern_rebuild(f"!reloadpatterns by {player.name}", channel)
         self.log(f"[CMD] {player.name} reloaded regex patterns.")
@@ -27,6 +27,8 @@ import time
 import minqlx
 from minqlx import Plugin, Player
 
+from . import _asynclog
+
 
 class backfire(Plugin):
     def __init__(self):
@@ -34,6 +36,7 @@ class backfire(Plugin):
 
         self.add_hook("game_countdown", self.handle_game_countdown)
         self.add_hook("damage", self.handle_damage_event)
+        self.add_hook("unload", self.handle_unload)
         self.add_command("bfv", self.cmd_bfv)
 
         self.version = "1.0"
@@ -86,8 +89,11 @@ class backfire(Plugin):
             target.name, target.steam_id,
             dmg
         )
-        with open(self.backfire_log_path, "a") as f:
-            f.write(log_line)
+        _asynclog.write(self.backfire_log_path, log_line)
+
+    def handle_unload(self, plugin):
+        if plugin == self.__class__.__name__:
+            _asynclog.flush()
 
     def cmd_bfv(self, player, msg, channel):
         channel.reply("^2Backfire Plugin v{}".format(self.version))
@@ -0,0 +1,102 @@
+# Benchmark: aliasesplus !alias lookup, one LRANGE per steam ID vs. one pipeline.
+#
+# Runs without minqlx or a Redis server. FakeRedis charges a fixed latency per
+# round trip (default 0.2 ms, roughly a local Redis over TCP). From the plugins folder:
+#   python3 benchmarks/bench_aliases_lookup.py [round trip ms]
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import _aliases  # noqa: E402
+
+
+class FakeRedis:
+    """The few commands the lookup needs, with a simulated network round trip."""
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.sets = {}
+        self.lists = {}
+        self.round_trips = 0
+
+    def _round_trip(self):
+        self.round_trips += 1
+        time.sleep(self.latency)
+
+    def smembers(self, key):
+        self._round_trip()
+        return set(self.sets.get(key, ()))
+
+    def lrange(self, key, start, end):
+        self._round_trip()
+        return list(self.lists.get(key, ()))
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, db):
+        self.db = db
+        self.calls = []
+
+    def lrange(self, key, start, end):
+        self.calls.append(key)
+
+    def execute(self):
+        self.db._round_trip()
+        return [list(self.db.lists.get(key, ())) for key in self.calls]
+
+
+def old_lookup(db, ip_address):
+    """The loop cmd_alias used before the pipelined lookup."""
+    steam_ids = list(db.smembers(f"minqlx:ips:{ip_address}"))
+    names = []
+    for sid in steam_ids:
+        names.extend(db.lrange(f"minqlx:players:{sid}", 0, -1))
+    return steam_ids, names
+
+
+def populate(db, linked):
+    ip = "10.0.0.1"
+    steam_ids = [str(76561198000000000 + i) for i in range(linked)]
+    db.sets[f"minqlx:ips:{ip}"] = set(steam_ids)
+    for sid in steam_ids:
+        db.lists[f"minqlx:players:{sid}"] = [f"name{sid[-4:]}_{n}" for n in range(5)]
+    return ip
+
+
+def bench(db, fn, ip, repeat=5):
+    best = None
+    for _ in range(repeat):
+        db.round_trips = 0
+        start = time.perf_counter()
+        fn(db, ip)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best * 1000, db.round_trips
+
+
+def main():
+    latency = (float(sys.argv[1]) if len(sys.argv) > 1 else 0.2) / 1000
+
+    print(f"simulated round trip {latency * 1000:.2f} ms")
+    print(f"{'linked IDs':>10}  {'loop ms':>9} {'trips':>5}  {'pipeline ms':>11} {'trips':>5}  {'speedup':>7}")
+    for linked in (1, 10, 50, 100, 250, 500):
+        db = FakeRedis(latency)
+        ip = populate(db, linked)
+
+        old_ids, old_names = old_lookup(db, ip)
+        new_ids, new_names = _aliases.lookup_ip(db, ip)
+        assert sorted(old_names) == sorted(new_names) and sorted(old_ids) == sorted(new_ids)
+
+        old_ms, old_trips = bench(db, old_lookup, ip)
+        new_ms, new_trips = bench(db, _aliases.lookup_ip, ip)
+        print(f"{linked:>10}  {old_ms:9.2f} {old_trips:5}  {new_ms:11.2f} {new_trips:5}  {old_ms / new_ms:6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Benchmark: autokick chat matching, old per-entry loop vs. the compiled ChatMatcher.
+#
+# Runs without minqlx. From the plugins folder:
+#   python3 benchmarks/bench_autokick_matcher.py [words] [patterns] [messages]
+
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _autokick_matcher import ChatMatcher  # noqa: E402
+
+
+def old_match(banned_words, regex_patterns, msg):
+    """The loop autokick.handle_chat used before the compiled matcher."""
+    lower_msg = msg.lower()
+    for word in banned_words:
+        if word in lower_msg:
+            return "word", word
+    for pattern in regex_patterns:
+        if pattern.search(msg):
+            return "regex", pattern.pattern
+    return None
+
+
+def random_word(rng, lo=4, hi=10):
+    return "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(lo, hi)))
+
+
+def build_dataset(n_words, n_patterns, n_messages, seed=1):
+    rng = random.Random(seed)
+    words = {random_word(rng) for _ in range(n_words)}
+    patterns = [
+        re.compile(r"\b{}\d+{}\b".format(random_word(rng, 3, 5), random_word(rng, 2, 4)), re.IGNORECASE)
+        for _ in range(n_patterns)
+    ]
+    word_list = sorted(words)
+    messages = []
+    for i in range(n_messages):
+        text = " ".join(random_word(rng, 2, 8) for _ in range(rng.randint(3, 12)))
+        if i % 20 == 0:
+            text += " " + rng.choice(word_list).upper()
+        messages.append(text)
+    return words, patterns, messages
+
+
+def bench(label, fn, messages, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for msg in messages:
+            fn(msg)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    per_msg = best / len(messages) * 1e6
+    print(f"{label:<10} {best * 1000:9.2f} ms total  {per_msg:8.2f} us/msg")
+    return best
+
+
+def main():
+    n_words = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    n_patterns = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    n_messages = int(sys.argv[3]) if len(sys.argv) > 3 else 2000
+
+    words, patterns, messages = build_dataset(n_words, n_patterns, n_messages)
+
+    start = time.perf_counter()
+    matcher = ChatMatcher(words, patterns)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    # Both must agree on which messages are blocked
+    for msg in messages:
+        assert (old_match(words, patterns, msg) is None) == (matcher.match(msg) is None), msg
+
+    print(f"{len(words)} words, {len(patterns)} patterns, {len(messages)} messages "
+          f"(matcher build {build_ms:.1f} ms)")
+    old = bench("loop", lambda m: old_match(words, patterns, m), messages)
+    new = bench("matcher", matcher._match, messages)
+    print(f"speedup    {old / new:9.1f}x")
+
+    # Same messages again through the verdict cache (a pasted flood)
+    matcher.cache.clear()
+    matcher.cache.hits = matcher.cache.misses = 0
+    bench("cached", matcher.match, messages)
+    print(f"cache hit rate {matcher.cache.hit_rate():.0%}")
+
+    # !addword / !delword: one word in and out again, relinked in place
+    rng = random.Random(2)
+    worst = 0.0
+    start = time.perf_counter()
+    for _ in range(200):
+        word = random_word(rng)
+        t = time.perf_counter()
+        matcher.add_word(word)
+        matcher.remove_word(word)
+        worst = max(worst, time.perf_counter() - t)
+    per_pair = (time.perf_counter() - start) / 200 * 1000
+    print(f"add+remove word {per_pair:.3f} ms avg, {worst * 1000:.3f} ms max")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# Benchmark: how long the game thread is held per message with the regex sandbox on.
+#
+# A pathological message times out, then normal messages follow straight away
+# while the sandbox swaps in its spare child; none of them may wait for a
+# child to start or compile its patterns. Exits non-zero if any message goes
+# over the budget plus the allowance for killing and spawning a child.
+#
+# Runs without minqlx. From the plugins folder:
+#   python3 benchmarks/bench_autokick_sandbox.py [patterns] [budget ms]
+
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from _autokick_matcher import ChatMatcher, RegexSandbox  # noqa: E402
+
+# Killing the timed out child and spawning a new spare, on top of the budget
+SLACK_MS = 30
+
+
+def wait_ready(sandbox, limit=30.0):
+    deadline = time.monotonic() + limit
+    while not (sandbox._active.ready() and sandbox._spare.ready()):
+        if time.monotonic() > deadline:
+            raise SystemExit("sandbox never got ready")
+        time.sleep(0.01)
+
+
+def timed(matcher, msg):
+    start = time.perf_counter()
+    verdict = matcher.match(msg)
+    return verdict, (time.perf_counter() - start) * 1000
+
+
+def main():
+    n_patterns = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    budget_ms = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    # No required literal, so every pattern runs on every message
+    patterns = [re.compile(r"\d{{3}}x{}y".format(i)) for i in range(n_patterns)]
+    patterns.append(re.compile(r"(a+)+$"))
+    matcher = ChatMatcher((), patterns)
+    sandbox = RegexSandbox(sys.executable)
+
+    worst = 0.0
+    events = []
+    matcher.on_event = lambda kind, detail: events.append(kind)
+
+    # First message right after set_budget: the children are still compiling
+    matcher.set_budget(sandbox, budget_ms / 1000)
+    verdict, ms = timed(matcher, "hello there")
+    print(f"right after set_budget  {ms:7.2f} ms  {verdict} {events[-1:]}")
+    worst = max(worst, ms)
+
+    wait_ready(sandbox)
+    for round_ in range(5):
+        verdict, ms = timed(matcher, "a" * 40 + "!")
+        print(f"pathological message    {ms:7.2f} ms  {verdict} {events[-1:]}")
+        worst = max(worst, ms)
+        for i in range(3):
+            verdict, ms = timed(matcher, f"normal message {round_} {i}")
+            print(f"  normal message        {ms:7.2f} ms  {verdict}")
+            worst = max(worst, ms)
+        wait_ready(sandbox)
+
+    sandbox.close()
+    limit = budget_ms + SLACK_MS
+    print(f"worst {worst:.2f} ms, limit {limit} ms ({n_patterns} patterns, {budget_ms} ms budget)")
+    if worst > limit:
+        raise SystemExit("a message held the game thread past the budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,8 @@ import minqlx
 import os
 import time
 
+from . import _outqueue, _scheduler
+
 class factoryvote(minqlx.Plugin):
     def __init__(self):
         self.version = "1.5"
@@ -36,6 +38,8 @@ class factoryvote(minqlx.Plugin):
         self.factories = self.load_factories()
         self.selected_factory = None
         self.add_hook("game_countdown", self.handle_game_countdown)
+        self.add_hook("player_disconnect", self.handle_player_disconnect)
+        self.add_hook("unload", self.handle_unload)
 
     def cmd_version(self, player, msg, channel):
         player.tell("^3FactoryVote Plugin Version:^7 {}".format(self.version))
@@ -60,6 +64,13 @@ class factoryvote(minqlx.Plugin):
             self.logger.warning("factories.txt is empty.")
         return factories
 
+    def handle_unload(self, plugin):
+        if plugin == self.__class__.__name__:
+            _scheduler.cancel_owner(plugin)
+
+    def handle_player_disconnect(self, player, reason):
+        _outqueue.discard(player)
+
     def handle_game_countdown(self):
         if self.selected_factory:
             self.msg("^3Game starting with factory:^7 {}".format(self.selected_factory))
@@ -101,10 +112,10 @@ class factoryvote(minqlx.Plugin):
             return
 
         if len(msg) == 1:
-            player.tell("^3Available Factories:")
-            for idx, factory in enumerate(self.factories, start=1):
-                player.tell("^7{}: {}".format(idx, factory))
-            player.tell("^3Use ^7!fv <number> ^3to start a vote.")
+            lines = ["^3Available Factories:"]
+            lines += ["^7{}: {}".format(idx, factory) for idx, factory in enumerate(self.factories, start=1)]
+            lines.append("^3Use ^7!fv <number> ^3to start a vote.")
+            _outqueue.tell(player, "\n".join(lines))
             return
 
         try:
@@ -126,7 +137,8 @@ class factoryvote(minqlx.Plugin):
 
         self.callvote(vote_command, vote_text)  # Factory name shown in vote
 
-        minqlx.delay(30)(self.check_vote_result)
+        # Only the latest vote is checked
+        _scheduler.debounce(self.__class__.__name__, "vote", 30, self.check_vote_result)
 
     def check_vote_result(self):
         if self.game.vote_passed:
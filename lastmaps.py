@@ -18,11 +18,14 @@
 import minqlx
 import time
 
+from . import _scheduler
+
 class lastmaps(minqlx.Plugin):
     def __init__(self):
         self.version = "1.2.1"  # Set your version number here
         self.add_hook("game_end", self.on_game_end)
         self.add_hook("map", self.on_map_load)
+        self.add_hook("unload", self.on_unload)
         self.add_command("lastmaps", self.cmd_lastmaps)
         self.add_command("lm", self.cmd_lastmaps)
         self.add_command("lmv", self.cmd_version, 3)    # New command for version display
@@ -38,8 +41,13 @@ class lastmaps(minqlx.Plugin):
         self.current_map = mapname
         self.map_start_time = time.time()
 
-        # Delay 5 minutes, then add current map (if not already added by game_end)
-        minqlx.delay(300)(self.add_current_map)
+        # Delay 5 minutes, then add current map (if not already added by game_end).
+        # A new map replaces the pending add from the previous one.
+        _scheduler.debounce(self.__class__.__name__, "add_current_map", 300, self.add_current_map)
+
+    def on_unload(self, plugin):
+        if plugin == self.__class__.__name__:
+            _scheduler.cancel_owner(plugin)
 
     def on_game_end(self, data):
         self.add_current_map()
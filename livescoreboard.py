@@ -1,7 +1,8 @@
 import minqlx
 import os
 import datetime
-from threading import Timer
+
+from . import _asynclog, _scheduler
 
 LOG_FILE = os.path.join(os.path.dirname(__file__), "livescoreboard.log")
 VERSION = "1.7"
@@ -24,7 +25,7 @@ class livescoreboard(minqlx.Plugin):
         self.livescore_folder = self.get_cvar("qlx_lspath") or os.path.join(self.plugin_path, "livescores")
         self.file_path = os.path.join(self.livescore_folder, "index.html")
         self.refresh_interval = int(self.get_cvar("qlx_scorerefresh")) 
-        self.scoreboard_timer = None  # initialize the timer holder        
+        self.scoreboard_timer = None  # refresh job in the shared scheduler
 
         # Commands for status, customization, and reset
         self.add_command("lscheck", self.cmd_check_status)
@@ -44,6 +45,7 @@ class livescoreboard(minqlx.Plugin):
         self.add_hook("player_connect", self.handle_player_connect)
         self.add_hook("game_start", self.handle_game_start)
         self.add_hook("round_end", self.handle_round_end)
+        self.add_hook("unload", self.handle_unload)
 
         # Write initial scoreboard
         self.write_html()
@@ -180,22 +182,24 @@ class livescoreboard(minqlx.Plugin):
         """Performs an update and restarts the timer."""
         self.write_html()
         self.start_scoreboard_timer()  # re-schedule next update
+
+    def refresh_scoreboard(self):
+        """Runs from the repeating refresh job."""
+        self.write_html()
         self.log_debug("Scoreboard refreshed via timer.")
 
     def start_scoreboard_timer(self):
         """Starts or restarts the scoreboard update timer."""
         self.stop_scoreboard_timer()
-        self.refresh_interval = int(self.get_cvar("qlx_scorerefresh"))
-        self.scoreboard_timer = Timer(self.refresh_interval, self.update_scoreboard)
-        self.scoreboard_timer.start()
+        self.refresh_interval = max(1, int(self.get_cvar("qlx_scorerefresh")))
+        self.scoreboard_timer = _scheduler.every(self.__class__.__name__, self.refresh_interval,
+                                                 self.refresh_scoreboard, threaded=True)
 
     def stop_scoreboard_timer(self):
         """Stops the running scoreboard timer if active."""
-        try:
-            if self.scoreboard_timer and self.scoreboard_timer.is_alive():
-                self.scoreboard_timer.cancel()
-        except:
-            pass    
+        if self.scoreboard_timer:
+            self.scoreboard_timer.cancel()
+            self.scoreboard_timer = None
     
     def handle_game_start(self, _):
         """Ensures scoreboard updates after a game starts."""
@@ -205,6 +209,12 @@ class livescoreboard(minqlx.Plugin):
         """Forces a scoreboard update at the end of each round."""
         self.write_html()
 
+    def handle_unload(self, plugin):
+        """Stops the refresh job and writes out any queued log lines before the plugin goes away."""
+        if plugin == self.__class__.__name__:
+            _scheduler.cancel_owner(plugin)
+            _asynclog.flush()
+
     def cmd_check_status(self, player, msg, channel):
         player.tell("^2[LiveScoreboard]^7 is currently loaded and running!")
 
@@ -321,12 +331,7 @@ class livescoreboard(minqlx.Plugin):
     def log_debug(self, message):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
-
-        try:
-            with open(LOG_FILE, "a") as f:
-                f.write(log_entry)
-        except Exception as e:
-            self.logger.warning(f"Failed to write to log file: {e}")
+        _asynclog.write(LOG_FILE, log_entry)
     
     def cmd_force_update(self, player, msg, channel):
         """Forces the scoreboard to regenerate immediately."""
@@ -5,9 +5,12 @@
 # !addmotd <message>        Adds a new line to the next free slot.
 # !clearmotd                Clears all MOTD lines.
 # !reloadmotd 				reload MOTD lines from motd.cfg in /baseq3 anytime
+# !outqueue                 Shows the shared output queue: depth, lines sent and dropped.
 # Use set qlx_motd1, set qlx_motd2, etc to set from config file.
 # Add /exec motd.cfg to config.cfg or simply !reloadmotd
 # Config settings will not override existing motd (use !clearmotd and restart server).
+# The MOTD is kept in memory; edits on any server sharing the Redis are announced on
+# the minqlx:motd channel so every server reloads its copy.
 
 # minqlx - A Quake Live server administrator bot.
 # Copyright (C) 2015 Mino <mino@minomino.org>
@@ -29,6 +32,9 @@
 
 import minqlx
 import minqlx.database
+import time
+
+from . import _outqueue
 
 MOTD_SET_KEY = "minqlx:motd"
 
@@ -43,6 +49,9 @@ class motd(minqlx.Plugin):
         self.add_command("clearmotd", self.cmd_clearmotd, 4)
         self.add_command("motd", self.cmd_getmotd)
         self.add_command("reloadmotd", self.cmd_reloadmotd, 4)
+        self.add_command("outqueue", self.cmd_outqueue, 4)
+        self.add_hook("player_disconnect", self.handle_player_disconnect)
+        self.add_hook("unload", self.handle_unload)
 
         self.home = self.get_cvar("fs_homepath")
         self.motd_key = MOTD_SET_KEY + ":{}".format(self.home)
@@ -52,26 +61,94 @@ class motd(minqlx.Plugin):
         self.set_cvar_once("qlx_motdSound", "sound/vo/crash_new/37b_07_alt.wav")
         self.set_cvar_once("qlx_motdHeader", "^6======= ^7Message of the Day ^6=======^7")
 
+        # Rendered MOTD (header + lines), None when no MOTD is set
+        self.motd_lines = None
+
         # Load MOTD from config if Redis is empty
         if self.motd_key not in self.db:
             self.load_motd_from_config()
+        self.refresh_motd()
+
+        # Reload the cached copy whenever any server changes this MOTD
+        self.listening = True
+        self.listen_motd()
+
+    def handle_unload(self, plugin):
+        if plugin == self.__class__.__name__:
+            self.listening = False
+
+    def handle_player_disconnect(self, player, reason):
+        _outqueue.discard(player)
+
+    # ------------------------------
+    #     CACHE
+    # ------------------------------
+
+    def render_motd(self, motd):
+        if motd is None:
+            return None
+        header = self.get_cvar("qlx_motdHeader").split("\\n")
+        return header + motd.split("\\n")
+
+    def refresh_motd(self):
+        self.motd_lines = self.render_motd(self.db.get(self.motd_key))
+
+    def store_motd(self, motd):
+        """Write the MOTD (None clears it), update the cache and tell the other servers."""
+        if motd is None:
+            self.db.delete(self.motd_key)
+        else:
+            self.db[self.motd_key] = motd
+        self.motd_lines = self.render_motd(motd)
+        self.db.publish(MOTD_SET_KEY, self.home)
+
+    @minqlx.thread
+    def listen_motd(self):
+        pubsub = None
+        while self.listening:
+            try:
+                if pubsub is None:
+                    pubsub = self.db.pubsub(ignore_subscribe_messages=True)
+                    pubsub.subscribe(MOTD_SET_KEY)
+                    # Changes may have been missed while not subscribed
+                    self.reload_motd()
+
+                message = pubsub.get_message(timeout=1.0)
+                if message and message["type"] == "message" and message["data"] == self.home:
+                    self.reload_motd()
+            except Exception as e:
+                self.logger.warning(f"MOTD listener error: {e}")
+                if pubsub is not None:
+                    try:
+                        pubsub.close()
+                    except Exception:
+                        pass
+                    pubsub = None
+                time.sleep(5)
+
+        if pubsub is not None:
+            pubsub.close()
+
+    @minqlx.next_frame
+    def reload_motd(self):
+        # Header cvar is read on the game thread
+        self.refresh_motd()
 
     @minqlx.delay(2)
     def handle_player_loaded(self, player):
-        try:
-            motd = self.db[self.motd_key]
-        except KeyError:
+        lines = self.motd_lines
+        if lines is None:
             return
 
         sound = self.get_cvar("qlx_motdSound")
         if sound and self.db.get_flag(player, "essentials:sounds_enabled", default=True):
             self.play_sound(sound, player)
 
-        self.send_motd(player, motd)
+        self.send_motd(player, lines)
 
     def cmd_getmotd(self, player, msg, channel):
-        if self.motd_key in self.db:
-            self.send_motd(player, self.db[self.motd_key])
+        if self.motd_lines is not None:
+            self.send_motd(player, self.motd_lines)
         else:
             player.tell("No MOTD has been set.")
         return minqlx.RET_STOP_EVENT
@@ -80,7 +157,7 @@ class motd(minqlx.Plugin):
         if len(msg) < 2:
             return minqlx.RET_USAGE
 
-        self.db[self.motd_key] = " ".join(msg[1:])
+        self.store_motd(" ".join(msg[1:]))
         player.tell("MOTD has been set.")
         return minqlx.RET_STOP_EVENT
 
@@ -88,23 +165,34 @@ class motd(minqlx.Plugin):
         if len(msg) < 2:
             return minqlx.RET_USAGE
 
-        motd = self.db.get(self.motd_key, "")
+        motd = self.db.get(self.motd_key) or ""
         new_line = " ".join(msg[1:])
         updated = motd + "\\n" + new_line if motd else new_line
-        self.db[self.motd_key] = updated
+        self.store_motd(updated)
         player.tell("Line added to MOTD.")
         return minqlx.RET_STOP_EVENT
 
     def cmd_clearmotd(self, player, msg, channel):
-        del self.db[self.motd_key]
+        self.store_motd(None)
         player.tell("MOTD has been cleared.")
         return minqlx.RET_STOP_EVENT
 
     def cmd_reloadmotd(self, player, msg, channel):
-        self.load_motd_from_config()
+        if not self.load_motd_from_config():
+            # Nothing in the config: still pick up a changed header
+            self.refresh_motd()
         player.tell("MOTD has been reloaded from config and applied.")
         return minqlx.RET_STOP_EVENT
 
+    def cmd_outqueue(self, player, msg, channel):
+        stats = _outqueue.stats()
+        channel.reply(
+            f"^3Output queue:^7 {stats['depth']} lines queued for {stats['clients']} clients | "
+            f"sent: {stats['lines']} lines in {stats['sent']} commands | "
+            f"dropped: {stats['dropped']} | expired: {stats['expired']}"
+        )
+        return minqlx.RET_STOP_EVENT
+
     def load_motd_from_config(self):
         lines = []
         for i in range(1, 11):
@@ -113,10 +201,9 @@ class motd(minqlx.Plugin):
                 lines.append(line)
 
         if lines:
-            self.db[self.motd_key] = "\\n".join(lines)
+            self.store_motd("\\n".join(lines))
+        return bool(lines)
 
-    def send_motd(self, player, motd):
-        for line in self.get_cvar("qlx_motdHeader").split("\\n"):
-            player.tell(line)
-        for line in motd.split("\\n"):
-            player.tell(line)
\ No newline at end of file
+    def send_motd(self, player, lines):
+        # Queued and packed so a map change full of joining players doesn't burst
+        _outqueue.tell(player, "\n".join(lines))
\ No newline at end of file
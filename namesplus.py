@@ -1,3 +1,5 @@
+# !enforce and game start enforcement read all stored names in one MGET and rename a few players per frame
+# !listnames [page] reads admin-set names from the minqlx:namesplus:names hash with HSCAN
 # Updated by Doomsday 16 February 2026 - Added !enforce command
 # Updated by Doomsday 16 August 2025 - Fixed tab errors
 # Updated by Doomsday 13 July 2025 - qlx_enforceAdminName 1 now also enforces names at game start
@@ -32,9 +34,20 @@ import minqlx
 import re
 import os
 import datetime
+import time
+from collections import deque
+
+from . import _asynclog, _outqueue, _scanpages
 
 _re_remove_excessive_colors = re.compile(r"(?:\^.)+(\^.)")
+_re_trailing_colors = re.compile(r"(?:\^.)+$")
 _name_key = "minqlx:players:{}:colored_name"
+# Hash of steam ID -> admin-set name, kept alongside the colored_name keys for !listnames
+_names_hash = "minqlx:namesplus:names"
+_names_migrated = "minqlx:namesplus:names:migrated"
+LIST_PAGE_SIZE = 15
+# Names enforced per server frame by !enforce and at game start
+RENAMES_PER_FRAME = 4
 LOG_FILE = os.path.join(os.path.dirname(__file__), "namesplus.log")
 
 VERSION = "1.6.0"
@@ -45,11 +58,14 @@ class namesplus(minqlx.Plugin):
         self.add_hook("player_loaded", self.handle_player_loaded)
         self.add_hook("player_disconnect", self.handle_player_disconnect)
         self.add_hook("userinfo", self.handle_userinfo)
+        self.add_hook("map", self.handle_map)
+        self.add_hook("game_start", self.handle_game_start)
+        self.add_hook("unload", self.handle_unload)
         self.add_command("name", self.cmd_name, usage="<name>")
         self.add_command("setname", self.cmd_setname_admin, usage="<player id> <name>", permission=4)
         self.add_command("clear", self.cmd_clear_name, usage="<player id>", permission=4)
         self.add_command("npv", self.cmd_version)
-        self.add_command("listnames", self.cmd_list_names, permission=3)
+        self.add_command("listnames", self.cmd_list_names, usage="[page]", permission=3)
         self.add_command("enforce", self.cmd_enforce, permission=4)
         
         self.set_cvar_once("qlx_enforceSteamName", "0")
@@ -57,72 +73,96 @@ class namesplus(minqlx.Plugin):
         self.name_set = False
         
         self.set_cvar_once("qlx_enforceAdminName", "1")
+        self.read_settings()
+
+        # Running !enforce / game start enforcement, renames are applied a few per frame
+        self.enforce_job = None
+
+        # Admin-set name of every connected player (None = no override), loaded once on connect
+        self.overrides = {}
+        players = self.players()
+        if players:
+            names = self.db.mget([_name_key.format(p.steam_id) for p in players])
+            self.overrides = {p.steam_id: name for p, name in zip(players, names)}
+
+        # !listnames: admin steam ID -> HSCAN positions of the pages walked so far
+        self.list_cursors = {}
+        # "building", "ready" or "failed"; !listnames retries a failed migration
+        self.names_index = "building"
+        self.migrate_names()
+
+    def read_settings(self):
+        # Cached so the userinfo path doesn't parse cvars; refreshed on every map load
+        self.enforce_admin_name = self.get_cvar("qlx_enforceAdminName", bool)
+        self.enforce_steam_name = self.get_cvar("qlx_enforceSteamName", bool)
+
+    def handle_map(self, mapname, factory):
+        self.read_settings()
+
+    def get_override(self, steam_id):
+        """Admin-set name for steam_id, from memory for connected players."""
+        if steam_id in self.overrides:
+            return self.overrides[steam_id]
+        return self.db.get(_name_key.format(steam_id))
 
     def handle_player_connect(self, player):
         self.steam_names[player.steam_id] = player.clean_name
+        self.overrides[player.steam_id] = self.db.get(_name_key.format(player.steam_id))
 
     def handle_player_loaded(self, player):
-        name_key = _name_key.format(player.steam_id)
-        if name_key in self.db:
-            db_name = self.db[name_key]
-            if not self.get_cvar("qlx_enforceSteamName", bool) or self.clean_text(db_name).lower() == player.clean_name.lower():
+        db_name = self.get_override(player.steam_id)
+        if db_name is not None:
+            if not self.enforce_steam_name or self.clean_text(db_name).lower() == player.clean_name.lower():
                 self.name_set = True
                 player.name = db_name
                 self.log_debug(f"Set loaded name for {player.id} ({player.clean_name}) to: {db_name}")
 
     def handle_player_disconnect(self, player, reason):
         self.steam_names.pop(player.steam_id, None)
+        self.overrides.pop(player.steam_id, None)
+        self.list_cursors.pop(player.steam_id, None)
+        _outqueue.discard(player)
+
+    def handle_unload(self, plugin):
+        if plugin == self.__class__.__name__:
+            self.enforce_job = None
+            _asynclog.flush()
 
     def handle_game_start(self, data):
-        if not self.get_cvar("qlx_enforceAdminName", bool):
+        if not self.enforce_admin_name:
             return
-
-        enforced_count = 0
-        for p in self.players():
-            name_key = _name_key.format(p.steam_id)
-            if name_key in self.db:
-                stored_name = self.db[name_key]
-                if p.name != stored_name:
-                    self.name_set = True
-                    p.name = stored_name
-                    p.tell(f"^3Your name has been updated to: {stored_name}")
-                    enforced_count += 1
-
-        self.log_debug(f"Automatically enforced {enforced_count} player names on game start.")
+        self.start_enforce("game start")
 
     def handle_userinfo(self, player, changed):
         if self.name_set:
             self.name_set = False
             return
 
-        name_key = _name_key.format(player.steam_id)
+        stored_name = self.get_override(player.steam_id)
 
         # Enforce admin-set names if qlx_enforceAdminName is enabled
-        if self.get_cvar("qlx_enforceAdminName", bool) and name_key in self.db:
-            changed["name"] = self.db[name_key]  # Restore admin-set name
-            player.name = stored_name  # Force name update immediately
-            player.tell(f"^3Your name has been updated to: {self.db[name_key]}")  # Notify player
+        if self.enforce_admin_name and stored_name is not None:
+            if changed.get("name", stored_name) != stored_name:
+                player.tell(f"^3Your name has been updated to: {stored_name}")  # Notify player
+            changed["name"] = stored_name  # Restore admin-set name
             return changed
 
         # Regular name handling
         if "name" in changed:
-            if name_key not in self.db:
+            if stored_name is None:
                 self.steam_names[player.steam_id] = self.clean_text(changed["name"])
             elif self.steam_names.get(player.steam_id) == self.clean_text(changed["name"]):
-                changed["name"] = self.db[name_key]
-                player.name = stored_name  # Force name update immediately
-                player.tell(f"^3Your name has been updated to: {self.db[name_key]}")  # Notify player
+                changed["name"] = stored_name
+                player.tell(f"^3Your name has been updated to: {stored_name}")  # Notify player
                 return changed
             else:
-                del self.db[name_key]
+                self.delete_name(player.steam_id)
                 player.tell("Your registered name has been reset.")
 
     def cmd_name(self, player, msg, channel):
-        name_key = _name_key.format(player.steam_id)
-
         if len(msg) < 2:
-            if name_key in self.db:
-                del self.db[name_key]
+            if self.get_override(player.steam_id) is not None:
+                self.delete_name(player.steam_id)
                 player.tell("Your registered name has been removed.")
                 return minqlx.RET_STOP_ALL
             return minqlx.RET_USAGE
@@ -134,7 +174,7 @@ class namesplus(minqlx.Plugin):
         name = "^7" + name
         self.name_set = True
         player.name = name
-        self.db[name_key] = name
+        self.store_name(player.steam_id, name)
         player.tell("The name has been registered. To remove it, use ^6!name^7 with no arguments.")
         self.log_debug(f"Player {player.id} set their name to: {name}")
         return minqlx.RET_STOP_ALL
@@ -161,7 +201,7 @@ class namesplus(minqlx.Plugin):
             return minqlx.RET_STOP_ALL
 
         name = "^7" + name
-        self.db[_name_key.format(steam_id)] = name  # Store name in Redis using Steam ID
+        self.store_name(steam_id, name)  # Store name in Redis using Steam ID
 
         if target:
             self.name_set = True
@@ -190,10 +230,8 @@ class namesplus(minqlx.Plugin):
             player.tell("Player not found or invalid ID.")
             return minqlx.RET_STOP_ALL
 
-        name_key = _name_key.format(steam_id)
-
-        if name_key in self.db:
-            del self.db[name_key]
+        if self.get_override(steam_id) is not None:
+            self.delete_name(steam_id)
             player.tell(f"Cleared name override for Steam ID {steam_id}.")
             if target:
                 target.tell("An admin has cleared your custom name.")
@@ -208,42 +246,156 @@ class namesplus(minqlx.Plugin):
 
     def cmd_enforce(self, player, msg, channel):
         """Enforces stored names for currently connected players."""
-        enforced_count = 0
+        if not self.start_enforce(f"admin {player.id}", player):
+            player.tell("^3Name enforcement is already running.")
+        return minqlx.RET_STOP_ALL
 
-        for p in self.players():  # Loop through all connected players
-            name_key = _name_key.format(p.steam_id)  # Get stored name key
+    # ------------------------------
+    #     BATCHED ENFORCEMENT
+    # ------------------------------
 
-            if name_key in self.db:  # Check if the player has a stored name
-                stored_name = self.db[name_key]
+    def start_enforce(self, reason, admin=None):
+        """Fetch every connected player's stored name at once and queue the renames."""
+        if self.enforce_job is not None:
+            return False
 
-                if p.name != stored_name:  # If current name is different, update it
-                    self.name_set = True
-                    p.name = stored_name
-                    p.tell(f"^3Your name has been updated to: {stored_name}")
-                    enforced_count += 1
+        start = time.perf_counter()
+        players = self.players()
+        names = self.db.mget([_name_key.format(p.steam_id) for p in players]) if players else []
+        fetch_ms = (time.perf_counter() - start) * 1000
+
+        renames = deque()
+        for p, stored_name in zip(players, names):
+            self.overrides[p.steam_id] = stored_name  # refresh the per-connection cache
+            # Player.name ends in ^7 and stored names start with it, so compare what is rendered
+            if stored_name is not None and self.rendered_name(p.name) != self.rendered_name(stored_name):
+                renames.append((p, stored_name))
+
+        self.enforce_job = {
+            "reason": reason, "admin": admin, "checked": len(players), "renames": renames,
+            "enforced": 0, "frames": 0, "start": start, "fetch_ms": fetch_ms,
+        }
+        self.apply_renames(self.enforce_job)
+        return True
 
-        player.tell(f"^3Enforced names for {enforced_count} players.")
-        self.log_debug(f"Admin {player.id} enforced {enforced_count} player names.")
+    def apply_renames(self, job):
+        if job is not self.enforce_job:
+            return  # superseded (plugin reloaded)
+
+        renames = job["renames"]
+        for _ in range(min(RENAMES_PER_FRAME, len(renames))):
+            p, stored_name = renames.popleft()
+            try:
+                p.update()  # raises if the player left (or the slot was taken) meanwhile
+            except minqlx.NonexistentPlayerError:
+                continue
+            self.name_set = True
+            p.name = stored_name
+            _outqueue.tell(p, f"^3Your name has been updated to: {stored_name}")
+            job["enforced"] += 1
+        job["frames"] += 1
 
-        return minqlx.RET_STOP_ALL
-    
-    def cmd_list_names(self, player, msg, channel):
-        admin_names = []
-    
-        for key in self.db.keys("minqlx:players:*:colored_name"):  # Get all stored names
-            steam_id = key.split(":")[2]  # Extract Steam ID from key format
-            name = self.db[key]
-            
-            # Ensure Steam ID is always displayed in white, separate from colored names
-            admin_names.append(f"^7Steam ID {steam_id}: {name}")
-
-        if not admin_names:
-            player.tell("^3No admin-set names found.")
+        if renames:
+            minqlx.next_frame(self.apply_renames)(job)
         else:
-            player.tell("^3Admin-set names:^7\n" + "\n".join(admin_names))
+            self.finish_enforce(job)
+
+    def finish_enforce(self, job):
+        self.enforce_job = None
+        total_ms = (time.perf_counter() - job["start"]) * 1000
+        summary = (f"Enforced {job['enforced']} of {job['checked']} player names over {job['frames']} frames "
+                   f"in {total_ms:.1f} ms (Redis {job['fetch_ms']:.1f} ms)")
+        if job["admin"] is not None:
+            job["admin"].tell(f"^3{summary}.")
+        self.log_debug(f"{summary} [{job['reason']}].")
+
+    def cmd_list_names(self, player, msg, channel):
+        if len(msg) > 1 and not msg[1].isdigit():
+            return minqlx.RET_USAGE
+        if self.names_index != "ready":
+            if self.names_index == "failed":
+                self.names_index = "building"
+                self.migrate_names()
+                player.tell("^3Indexing the name list failed earlier, retrying now. Try again shortly.")
+            else:
+                player.tell("^3Name list is still being indexed, try again shortly.")
+            return minqlx.RET_STOP_ALL
+
+        page = max(1, int(msg[1])) if len(msg) > 1 else 1
+        entries, more = self.read_names_page(player.steam_id, page)
+
+        if not entries:
+            player.tell("^3No admin-set names found." if page == 1 else f"^3No admin-set names on page {page}.")
+            return minqlx.RET_STOP_ALL
+
+        # Ensure Steam ID is always displayed in white, separate from colored names
+        lines = [f"^3Admin-set names, page {page}:^7"]
+        lines += [f"^7Steam ID {steam_id}: {name}" for steam_id, name in entries]
+        if more:
+            lines.append(f"^3Use ^7!listnames {page + 1}^3 for more.")
+        _outqueue.tell(player, "\n".join(lines))
 
         return minqlx.RET_STOP_ALL
 
+    # ------------------------------
+    #     NAME HASH INDEX
+    # ------------------------------
+
+    def store_name(self, steam_id, name):
+        pipe = self.db.pipeline()
+        pipe.set(_name_key.format(steam_id), name)
+        pipe.hset(_names_hash, str(steam_id), name)
+        pipe.execute()
+        if steam_id in self.overrides:
+            self.overrides[steam_id] = name
+
+    def delete_name(self, steam_id):
+        pipe = self.db.pipeline()
+        pipe.delete(_name_key.format(steam_id))
+        pipe.hdel(_names_hash, str(steam_id))
+        pipe.execute()
+        if steam_id in self.overrides:
+            self.overrides[steam_id] = None
+
+    @minqlx.thread
+    def migrate_names(self):
+        """One-time copy of the existing colored_name keys into the hash, using SCAN."""
+        try:
+            if not self.db.exists(_names_migrated):
+                copied = 0
+                keys = []
+                for key in self.db.scan_iter(match=_name_key.format("*"), count=500):
+                    keys.append(key)
+                    if len(keys) >= 500:
+                        copied += self.copy_names(keys)
+                        keys = []
+                if keys:
+                    copied += self.copy_names(keys)
+                self.db.set(_names_migrated, "1")
+                self.log_debug(f"Migrated {copied} admin-set names into {_names_hash}.")
+            self.names_index = "ready"
+        except Exception as e:
+            self.names_index = "failed"
+            self.logger.error(f"namesplus name index migration failed: {e}")
+
+    def copy_names(self, keys):
+        names = self.db.mget(keys)
+        mapping = {key.split(":")[2]: name for key, name in zip(keys, names) if name is not None}
+        if mapping:
+            self.db.hset(_names_hash, mapping=mapping)
+        return len(mapping)
+
+    def read_names_page(self, admin_id, page):
+        """One page of the name hash with HSCAN. Returns ([(steam ID, name), ...], more pages)."""
+        starts = self.list_cursors.setdefault(admin_id, [_scanpages.FIRST])
+        if page == 1:
+            del starts[1:]  # start over: the hash may have changed
+        return _scanpages.read_page(self.scan_names, starts, page, LIST_PAGE_SIZE)
+
+    def scan_names(self, cursor, count):
+        next_cursor, batch = self.db.hscan(_names_hash, cursor, count=count)
+        return next_cursor, list(batch.items())
+
     def clean_excessive_colors(self, name):
         def sub_func(match):
             return match.group(1)
@@ -252,6 +404,11 @@ class namesplus(minqlx.Plugin):
     def clean_text(self, text):
         return re.sub(r"\^.", "", text)
 
+    def rendered_name(self, name):
+        """name without the color codes that don't change how it looks: repeats, trailing ones and a leading ^7."""
+        name = _re_trailing_colors.sub("", self.clean_excessive_colors(name))
+        return name[2:] if name.startswith("^7") else name
+
     def validate_name(self, player, name, admin_override=False):
         if len(name.encode()) > 36:
             player.tell("Name is too long. Try fewer colors or characters.")
@@ -262,7 +419,7 @@ class namesplus(minqlx.Plugin):
         if not self.clean_text(name).strip():
             player.tell("Blank names are not allowed.")
             return False
-        if not admin_override and self.get_cvar("qlx_enforceSteamName", bool):
+        if not admin_override and self.enforce_steam_name:
             if self.clean_text(name).lower() != player.clean_name.lower():
                 player.tell("Name must match your Steam name.")
                 return False
@@ -271,9 +428,5 @@ class namesplus(minqlx.Plugin):
     def log_debug(self, message):
         timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         log_entry = f"[{timestamp}] {message}\n"
-        try:
-            with open(LOG_FILE, "a") as f:
-                f.write(log_entry)
-        except Exception as e:
-            self.logger.warning(f"Failed to write to log file: {e}")
+        _asynclog.write(LOG_FILE, log_entry)
 